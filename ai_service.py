@@ -1,10 +1,17 @@
-import anthropic
-import os
-from dotenv import load_dotenv
+import sys
+from metrics_service import timed
+from registry_service import get
 
-load_dotenv()
+def retryable_errors() -> tuple:
+    """Failures worth another attempt: network trouble, rate limits, an overloaded API.
 
-client = anthropic.Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
+    Empty until the SDK has been imported, since no error can be one of its
+    types before then; checking doesn't import it.
+    """
+    anthropic = sys.modules.get("anthropic")
+    if anthropic is None:
+        return ()
+    return (anthropic.APIConnectionError, anthropic.RateLimitError, anthropic.InternalServerError)
 
 def generate_reengagement_message(client_name: str, days_inactive: int, notes: str = "", recent_checkins: list = None) -> str:
     checkin_context = ""
@@ -31,12 +38,14 @@ Write a short, warm message (2-3 sentences) that:
 
 Just output the message, nothing else."""
 
-    message = client.messages.create(
-        model="claude-sonnet-4-20250514",
-        max_tokens=200,
-        messages=[
-            {"role": "user", "content": prompt}
-        ]
-    )
+    client = get("anthropic")
+    with timed("llm"):
+        message = client.messages.create(
+            model="claude-sonnet-4-20250514",
+            max_tokens=200,
+            messages=[
+                {"role": "user", "content": prompt}
+            ]
+        )
     
     return message.content[0].text
\ No newline at end of file
@@ -0,0 +1,151 @@
+import numpy as np
+from datetime import datetime
+from typing import TYPE_CHECKING
+from sqlalchemy import select, func, case
+from sqlalchemy.ext.asyncio import AsyncSession
+from models import Client, CheckInWeekly
+from rollup_service import week_index
+from registry_service import get, load
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+RETENTION_WEEKS = 12
+FREQUENCY_BINS = [0, 0.5, 1, 2, 3, 5, np.inf]
+FREQUENCY_LABELS = ["< 0.5", "0.5–1", "1–2", "2–3", "3–5", "5+"]
+
+def current_week() -> int:
+    return week_index(datetime.utcnow())
+
+def _coach_rollups(coach_id: int):
+    # IN rather than a join, so SQLite walks the rollup primary key in client
+    # order and can group without a temp b-tree
+    return CheckInWeekly.client_id.in_(select(Client.id).where(Client.coach_id == coach_id))
+
+def client_summary_query(coach_id: int, now_week: int):
+    """One row per client: first/last week, total check-ins and least-squares sums
+    of weekly average weight against week (x is relative to now_week to keep
+    the sums small)."""
+    x = CheckInWeekly.week - now_week
+    avg_weight = CheckInWeekly.weight_sum / func.nullif(CheckInWeekly.weight_count, 0)
+    weighted = CheckInWeekly.weight_count > 0
+    return (
+        select(
+            CheckInWeekly.client_id,
+            func.min(CheckInWeekly.week),
+            func.max(CheckInWeekly.week),
+            func.sum(CheckInWeekly.checkin_count),
+            func.count(case((weighted, 1))),
+            func.sum(case((weighted, x))),
+            func.sum(avg_weight),
+            func.sum(x * avg_weight),
+            func.sum(case((weighted, x * x))),
+        )
+        .where(_coach_rollups(coach_id))
+        .group_by(CheckInWeekly.client_id)
+    )
+
+def edge_weight_query(coach_id: int, latest: bool):
+    """Average weight of each client's first (or latest) week with a weigh-in.
+
+    Relies on SQLite's bare-column rule: alongside a lone MIN()/MAX(), other
+    selected columns come from the row that produced the extreme.
+    """
+    extreme = func.max if latest else func.min
+    return (
+        select(CheckInWeekly.client_id, CheckInWeekly.weight_sum / CheckInWeekly.weight_count, extreme(CheckInWeekly.week))
+        .where(_coach_rollups(coach_id), CheckInWeekly.weight_count > 0)
+        .group_by(CheckInWeekly.client_id)
+    )
+
+def retention_query(coach_id: int):
+    """Number of clients with a check-in k weeks after their first, for k <= RETENTION_WEEKS"""
+    first = (
+        select(CheckInWeekly.client_id, func.min(CheckInWeekly.week).label("first_week"))
+        .where(_coach_rollups(coach_id))
+        .group_by(CheckInWeekly.client_id)
+        .subquery()
+    )
+    rel = (CheckInWeekly.week - first.c.first_week).label("rel")
+    return (
+        select(rel, func.count())
+        .join(first, first.c.client_id == CheckInWeekly.client_id)
+        .where(rel <= RETENTION_WEEKS)
+        .group_by(rel)
+    )
+
+def compute_cohort(summary: "pd.DataFrame", start_weight: "pd.Series", latest_weight: "pd.Series", retained: "pd.Series",
+                   goals: "pd.Series", total_clients: int, now_week: int) -> dict:
+    """Cohort metrics from per-client aggregates.
+
+    `summary` has one row per client with a check-in (columns as in
+    client_summary_query); the Series are indexed by client_id, except
+    `retained`, which is indexed by weeks since first check-in.
+    """
+    result = {
+        "total_clients": total_clients,
+        "active_clients": 0,
+        "retention": [],
+        "frequency": list(zip(FREQUENCY_LABELS, [0] * len(FREQUENCY_LABELS))),
+        "avg_weekly_change": None,
+        "median_weekly_change": None,
+        "goal_clients": 0,
+        "goal_reached": 0,
+        "goal_rate": None,
+    }
+    if summary.empty:
+        return result
+
+    # Active = checked in this week or last
+    result["active_clients"] = int((summary["last_week"] >= now_week - 1).sum())
+
+    # Retention: share of clients old enough to have reached week k who checked in during it
+    tenure = (now_week - summary["first_week"]).clip(lower=0).to_numpy()
+    eligible = np.bincount(np.minimum(tenure, RETENTION_WEEKS), minlength=RETENTION_WEEKS + 1)[::-1].cumsum()[::-1]
+    retained = retained.reindex(range(RETENTION_WEEKS + 1), fill_value=0).to_numpy()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rates = np.where(eligible > 0, retained / eligible, np.nan)
+    result["retention"] = [(k, None if np.isnan(r) else round(float(r) * 100, 1)) for k, r in enumerate(rates)]
+
+    # Check-ins per week over each client's tenure so far
+    per_week = summary["checkins"].to_numpy() / (tenure + 1)
+    counts, _ = np.histogram(per_week, bins=FREQUENCY_BINS)
+    result["frequency"] = list(zip(FREQUENCY_LABELS, counts.tolist()))
+
+    # Least-squares slope of weekly average weight, per client
+    n, sx, sy, sxy, sxx = (summary[col].astype(float) for col in ("n", "sx", "sy", "sxy", "sxx"))
+    denom = n * sxx - sx ** 2
+    valid = (n >= 2) & (denom > 0)
+    slopes = ((n * sxy - sx * sy) / denom)[valid]
+    if not slopes.empty:
+        result["avg_weekly_change"] = round(float(slopes.mean()), 2)
+        result["median_weekly_change"] = round(float(slopes.median()), 2)
+
+    # Goal attainment: direction is set by where the client started
+    goal = goals.reindex(start_weight.index)
+    has_goal = goal.notna()
+    start, latest, goal = start_weight[has_goal], latest_weight.reindex(start_weight.index)[has_goal], goal[has_goal]
+    reached = np.where(goal < start, latest <= goal, np.where(goal > start, latest >= goal, True))
+    result["goal_clients"] = int(has_goal.sum())
+    result["goal_reached"] = int(reached.sum())
+    if result["goal_clients"]:
+        result["goal_rate"] = round(result["goal_reached"] / result["goal_clients"] * 100, 1)
+
+    return result
+
+def _series(rows) -> "pd.Series":
+    return get("pandas").Series({key: value for key, value, *_ in rows}, dtype=float)
+
+async def cohort_analytics(db: AsyncSession, coach_id: int) -> dict:
+    """Coach-level analytics across every client, from aggregate queries over checkin_weekly"""
+    pd = await load("pandas")
+    now_week = current_week()
+    clients = (await db.execute(select(Client.id, Client.goal_weight).where(Client.coach_id == coach_id))).all()
+    summary = pd.DataFrame(
+        (await db.execute(client_summary_query(coach_id, now_week))).all(),
+        columns=["client_id", "first_week", "last_week", "checkins", "n", "sx", "sy", "sxy", "sxx"],
+    )
+    start_weight = _series((await db.execute(edge_weight_query(coach_id, latest=False))).all())
+    latest_weight = _series((await db.execute(edge_weight_query(coach_id, latest=True))).all())
+    retained = _series((await db.execute(retention_query(coach_id))).all())
+    return compute_cohort(summary, start_weight, latest_weight, retained, _series(clients), len(clients), now_week)
@@ -0,0 +1,72 @@
+"""Measure how long a worker takes to import the app, with `python -X importtime`.
+
+Run from the repository root:
+
+    python -m benchmarks.importtime
+    python -m benchmarks.importtime --runs 5 --budget 1.5
+
+Each run imports main in a fresh interpreter; the fastest run is reported,
+since slower ones mostly measure a cold disk cache. Exits non-zero when the
+import exceeds --budget seconds or loads a module that should only load on
+first use (see registry_service).
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+BUDGET = 2.0  # seconds; 1.1-1.3s with pandas and anthropic deferred, 3.6s before
+LAZY_MODULES = ["pandas", "anthropic"]
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def import_times(module: str = "main") -> list[tuple[str, int, int]]:
+    """(name, self us, cumulative us) for every module a fresh interpreter imports"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    if result.returncode:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr}")
+    times = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        if not self_us.strip().isdigit():
+            continue  # the header line
+        # Nested imports are indented; the name keeps its dotted path
+        times.append((name.strip(), int(self_us), int(cumulative_us)))
+    return times
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="CoachKit import-time benchmark")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--budget", type=float, default=BUDGET, help="seconds allowed for `import main`")
+    parser.add_argument("--top", type=int, default=10, help="slowest modules to list, by self time")
+    return parser.parse_args(argv)
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+
+    runs = [import_times() for _ in range(args.runs)]
+    times = min(runs, key=lambda run: dict((name, total) for name, _, total in run)["main"])
+    total = dict((name, cumulative) for name, _, cumulative in times)["main"] / 1e6
+
+    print(f"{'module':<40} {'self ms':>9} {'cumul ms':>9}")
+    for name, self_us, cumulative_us in sorted(times, key=lambda t: t[1], reverse=True)[:args.top]:
+        print(f"{name:<40} {self_us / 1000:>9.1f} {cumulative_us / 1000:>9.1f}")
+    print(f"import main: {total:.3f}s (fastest of {args.runs}, budget {args.budget}s)")
+
+    failures = []
+    if total > args.budget:
+        failures.append(f"import main took {total:.3f}s, over the {args.budget}s budget")
+    loaded = {name for name, _, _ in times}
+    for module in LAZY_MODULES:
+        if module in loaded:
+            failures.append(f"{module} is imported at startup; it should load on first use")
+    for line in failures:
+        print(f"REGRESSION {line}")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,312 @@
+"""Seed a synthetic dataset and measure per-route latency and throughput.
+
+Run from the repository root:
+
+    python -m benchmarks.run --clients 500 --concurrency 20
+    python -m benchmarks.run --mode http --save-baseline benchmarks/baseline.json
+    python -m benchmarks.run --baseline benchmarks/baseline.json
+    python -m benchmarks.run --accept-encoding identity   # bytes without compression
+
+The Anthropic client is replaced with a local stub, so no API key or network
+access is needed. Exits non-zero when --baseline is given and any route
+regresses beyond --tolerance.
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import random
+import re
+import socket
+import sys
+import tempfile
+import threading
+import time
+from html import unescape
+
+from benchmarks import stubs
+from benchmarks.seed import seed, coach_email, BENCH_PASSWORD
+
+ROUTES = ["login", "dashboard", "client_detail", "checkin", "bulk_checkin", "search", "import"]
+SEARCH_TERMS = ["Al", "Sam", "Jo", "Tay", "Chen", "Kim", "Riley", "Smith", "x"]
+IMPORT_ROWS = 50
+BULK_CHECKINS = 20  # one group session
+JOB_POLL_INTERVAL = 0.1  # seconds; the browser polls every 1s, which would swamp the timings, and much faster polling starves the server
+
+class BenchContext:
+    def __init__(self, coaches: int, clients: int, tokens: dict):
+        self.coaches = coaches
+        self.clients = clients
+        self.tokens = tokens
+
+    def session(self, rng: random.Random) -> tuple[int, dict]:
+        coach_id = rng.randint(1, self.coaches)
+        return coach_id, {"Cookie": f"session_token={self.tokens[coach_id]}"}
+
+    def client_id(self, rng: random.Random, coach_id: int) -> int:
+        # Seeded ids are contiguous per coach
+        return (coach_id - 1) * self.clients + rng.randint(1, self.clients)
+
+async def login(http, ctx, rng):
+    coach_id = rng.randint(1, ctx.coaches)
+    return await http.post("/login", data={"email": coach_email(coach_id), "password": BENCH_PASSWORD})
+
+async def dashboard(http, ctx, rng):
+    _, headers = ctx.session(rng)
+    return await http.get("/", headers=headers)
+
+async def client_detail(http, ctx, rng):
+    coach_id, headers = ctx.session(rng)
+    return await http.get(f"/client/{ctx.client_id(rng, coach_id)}", headers=headers)
+
+async def checkin(http, ctx, rng):
+    coach_id, headers = ctx.session(rng)
+    return await http.post(
+        f"/client/{ctx.client_id(rng, coach_id)}/checkin",
+        data={"note": "Benchmark check-in", "weight": f"{rng.uniform(130, 240):.1f}"},
+        headers=headers,
+    )
+
+async def bulk_checkin(http, ctx, rng):
+    coach_id, headers = ctx.session(rng)
+    return await http.post(
+        "/checkins/bulk",
+        json=[
+            {"client_id": ctx.client_id(rng, coach_id), "weight": round(rng.uniform(130, 240), 1), "note": "Benchmark group session"}
+            for _ in range(BULK_CHECKINS)
+        ],
+        headers=headers,
+    )
+
+async def search(http, ctx, rng):
+    _, headers = ctx.session(rng)
+    return await http.get("/clients/search", params={"q": rng.choice(SEARCH_TERMS)}, headers=headers)
+
+def import_csv(rng: random.Random) -> bytes:
+    lines = ["Full Name,Email,Goal,Notes,Weight"]
+    for i in range(IMPORT_ROWS):
+        lines.append(f"Imported {i},imported{i}@bench.local,{rng.randint(140, 200)},Imported client,{rng.randint(150, 230)}")
+    return ("\n".join(lines) + "\n").encode()
+
+def _hidden_inputs(html: str) -> dict:
+    """Form fields the import preview carries over to the confirm step"""
+    fields = {}
+    for name, double_quoted, single_quoted in re.findall(r'<input type="hidden" name="(\w+)" value=(?:"([^"]*)"|\'([^\']*)\')', html):
+        fields[name] = unescape(double_quoted or single_quoted)
+    return fields
+
+async def _job_result(http, response, headers):
+    """Poll a background job's status fragment until its result comes back"""
+    while response.status_code == 200:
+        match = re.search(r'hx-get="(/jobs/\w+)"', response.text)
+        if not match:
+            break
+        await asyncio.sleep(JOB_POLL_INTERVAL)
+        response = await http.get(match.group(1), headers=headers)
+    return response
+
+async def spreadsheet_import(http, ctx, rng):
+    """Analyze then confirm, timed as one operation including both background jobs"""
+    _, headers = ctx.session(rng)
+    analyzed = await http.post(
+        "/import/analyze",
+        files={"file": ("clients.csv", io.BytesIO(import_csv(rng)), "text/csv")},
+        headers=headers,
+    )
+    analyzed = await _job_result(http, analyzed, headers)
+    if analyzed.status_code != 200:
+        return analyzed
+    confirmed = await http.post("/import/confirm", data=_hidden_inputs(analyzed.text), headers=headers)
+    return await _job_result(http, confirmed, headers)
+
+SCENARIOS = {
+    "login": login,
+    "dashboard": dashboard,
+    "client_detail": client_detail,
+    "checkin": checkin,
+    "bulk_checkin": bulk_checkin,
+    "search": search,
+    "import": spreadsheet_import,
+}
+
+def percentile(sorted_values: list, pct: float) -> float:
+    """Nearest-rank percentile"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, round(pct / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+async def run_scenario(http, scenario, ctx, requests: int, concurrency: int, seed_value: int) -> dict:
+    latencies = []
+    errors = 0
+    wire_bytes = body_bytes = 0
+    remaining = requests
+
+    async def worker(n: int):
+        nonlocal remaining, errors, wire_bytes, body_bytes
+        rng = random.Random(seed_value * 1000 + n)
+        while remaining > 0:
+            remaining -= 1
+            start = time.perf_counter()
+            response = await scenario(http, ctx, rng)
+            latencies.append(time.perf_counter() - start)
+            # Multi-step scenarios (import) count only their final response
+            wire_bytes += response.num_bytes_downloaded
+            body_bytes += len(response.content)
+            if response.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(n) for n in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "wire_bytes": wire_bytes // len(latencies) if latencies else 0,
+        "body_bytes": body_bytes // len(latencies) if latencies else 0,
+    }
+
+async def run_mode(http, ctx, routes: list, requests: int, concurrency: int, seed_value: int) -> dict:
+    results = {}
+    for i, name in enumerate(routes):
+        # Warm caches and lazy imports so the first sample isn't an outlier
+        await SCENARIOS[name](http, ctx, random.Random(seed_value))
+        results[name] = await run_scenario(http, SCENARIOS[name], ctx, requests, concurrency, seed_value + i)
+    return results
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def _client_headers(args) -> dict:
+    # Without --accept-encoding, httpx's default (gzip, deflate, and br when brotli is installed)
+    return {"Accept-Encoding": args.accept_encoding} if args.accept_encoding else {}
+
+async def bench_inprocess(app, ctx, args) -> dict:
+    import httpx
+    from database import engine
+    transport = httpx.ASGITransport(app=app)
+    # ASGITransport doesn't send lifespan events; run startup (job workers etc.) directly
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", headers=_client_headers(args), timeout=60) as http:
+            try:
+                return await run_mode(http, ctx, args.routes, args.requests, args.concurrency, args.seed)
+            finally:
+                # Pooled connections belong to this event loop
+                await engine.dispose()
+
+async def bench_http(app, ctx, args) -> dict:
+    import httpx
+    import uvicorn
+
+    # Serve from a thread with its own event loop so client and server don't share one
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        await asyncio.sleep(0.05)
+
+    try:
+        limits = httpx.Limits(max_connections=args.concurrency)
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, headers=_client_headers(args), timeout=60) as http:
+            return await run_mode(http, ctx, args.routes, args.requests, args.concurrency, args.seed)
+    finally:
+        server.should_exit = True
+        thread.join()
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Routes whose p95 grew or throughput fell by more than `tolerance`"""
+    regressions = []
+    for mode, routes in results["modes"].items():
+        for route, current in routes.items():
+            base = baseline.get("modes", {}).get(mode, {}).get(route)
+            if not base:
+                continue
+            if current["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+                regressions.append(f"{mode}/{route}: p95 {base['p95_ms']}ms -> {current['p95_ms']}ms")
+            if current["rps"] < base["rps"] * (1 - tolerance):
+                regressions.append(f"{mode}/{route}: {base['rps']} req/s -> {current['rps']} req/s")
+            # Baselines saved before bytes were recorded have no wire_bytes
+            if base.get("wire_bytes") and current["wire_bytes"] > base["wire_bytes"] * (1 + tolerance):
+                regressions.append(f"{mode}/{route}: {base['wire_bytes']} -> {current['wire_bytes']} bytes on the wire")
+    return regressions
+
+def print_table(results: dict):
+    print(f"{'mode':<10} {'route':<14} {'req':>6} {'err':>5} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'wire B':>8} {'body B':>8}")
+    for mode, routes in results["modes"].items():
+        for route, r in routes.items():
+            print(f"{mode:<10} {route:<14} {r['requests']:>6} {r['errors']:>5} {r['rps']:>9} {r['p50_ms']:>9} {r['p95_ms']:>9} {r['p99_ms']:>9} {r['wire_bytes']:>8} {r['body_bytes']:>8}")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="CoachKit benchmark suite")
+    parser.add_argument("--coaches", type=int, default=2)
+    parser.add_argument("--clients", type=int, default=200, help="clients per coach")
+    parser.add_argument("--days", type=int, default=90, help="length of the check-in history")
+    parser.add_argument("--photo-rate", type=float, default=0.1, help="fraction of check-ins with a photo")
+    parser.add_argument("--requests", type=int, default=200, help="requests per route")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--mode", choices=["inprocess", "http", "both"], default="inprocess")
+    parser.add_argument("--routes", nargs="+", choices=ROUTES, default=ROUTES)
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="seconds the stubbed LLM call sleeps")
+    parser.add_argument("--accept-encoding", help='Accept-Encoding to send, e.g. "identity" to measure uncompressed bytes')
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--save-baseline", metavar="PATH")
+    parser.add_argument("--baseline", metavar="PATH")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    return parser.parse_args(argv)
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+
+    # The app reads DATABASE_URL at import, so point it at a scratch file first
+    workdir = tempfile.mkdtemp(prefix="coachkit-bench-")
+    database_url = f"sqlite+aiosqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ["DATABASE_URL"] = database_url
+
+    started = time.perf_counter()
+    dataset = seed(database_url, args.coaches, args.clients, args.days, args.photo_rate, args.seed)
+    print(f"Seeded {dataset} in {time.perf_counter() - started:.1f}s")
+
+    import main as app_module
+    from auth_service import create_token
+    stubs.install(args.llm_latency)
+
+    ctx = BenchContext(args.coaches, args.clients, {i: create_token(i) for i in range(1, args.coaches + 1)})
+    modes = ["inprocess", "http"] if args.mode == "both" else [args.mode]
+    results = {
+        "dataset": dataset,
+        "config": {"requests": args.requests, "concurrency": args.concurrency, "llm_latency": args.llm_latency,
+                   "accept_encoding": args.accept_encoding},
+        "modes": {},
+    }
+    for mode in modes:
+        runner = bench_inprocess if mode == "inprocess" else bench_http
+        results["modes"][mode] = asyncio.run(runner(app_module.app, ctx, args))
+
+    print_table(results)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline written to {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,24 @@
+"""Benchmark datasets, from the same generator as generate_data.py.
+
+Sharing it keeps the names, notes and check-in patterns the benchmarks see
+the same as those of the large generated databases.
+"""
+from generate_data import generate, coach_email, DEFAULT_PASSWORD
+
+BENCH_PASSWORD = DEFAULT_PASSWORD
+
+def sqlite_path(database_url: str) -> str:
+    """The app's aiosqlite URL as a file path for the generator"""
+    return database_url.split(":///", 1)[1]
+
+def seed(database_url: str, coaches: int = 2, clients: int = 200, days: int = 90, photo_rate: float = 0.1,
+         seed: int = 42) -> dict:
+    """Fill a fresh database file with synthetic coaches, clients and check-ins.
+
+    `clients` is per coach. On a fresh file ids start at 1 and each coach's
+    clients are contiguous, which BenchContext.client_id relies on. Photo
+    references are written without the files.
+    """
+    summary = generate(sqlite_path(database_url), coaches, clients, days, photo_rate=photo_rate, seed=seed,
+                       log=lambda message: None)
+    return {key: summary[key] for key in ("coaches", "clients", "checkins")}
@@ -0,0 +1,41 @@
+import json
+import time
+from types import SimpleNamespace
+
+# Columns of the CSV that the import scenario uploads
+IMPORT_MAPPING = {
+    "name": "Full Name",
+    "email": "Email",
+    "goal_weight": "Goal",
+    "notes": "Notes",
+    "weight": "Weight",
+    "confidence": "high",
+    "unmapped_columns": [],
+}
+
+class FakeMessages:
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    def create(self, model: str, max_tokens: int, messages: list):
+        # Blocks like the real SDK call does
+        if self.latency:
+            time.sleep(self.latency)
+        prompt = messages[-1]["content"]
+        if "Respond with ONLY a JSON object" in prompt:
+            text = json.dumps(IMPORT_MAPPING)
+        else:
+            text = "Hey! Haven't seen you in a bit. Want to get a quick check-in on the calendar this week?"
+        return SimpleNamespace(content=[SimpleNamespace(text=text)])
+
+class FakeAnthropic:
+    """Stand-in for anthropic.Anthropic so benchmarks never hit the network"""
+    def __init__(self, latency: float = 0.0):
+        self.messages = FakeMessages(latency)
+
+def install(latency: float = 0.0):
+    """Register a fake as the Anthropic client the services call"""
+    from registry_service import override
+    fake = FakeAnthropic(latency)
+    override("anthropic", fake)
+    return fake
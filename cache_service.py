@@ -0,0 +1,69 @@
+from collections import OrderedDict
+from datetime import datetime
+
+MAX_FRAGMENTS = 2000
+
+# Fragments and ETags key on the clients.version column, which every write
+# bumps in the database, so they hold across workers.
+# (template, coach_id, client_id, version, day) -> rendered HTML, in LRU order
+_fragments: OrderedDict[tuple, str] = OrderedDict()
+_keys_by_client: dict[int, set] = {}
+
+def drop_fragments(client_id: int):
+    """Free a deleted client's fragments; its failed ownership check already hides them"""
+    for key in _keys_by_client.pop(client_id, ()):
+        _fragments.pop(key, None)
+
+def fragment_key(template_name: str, coach_id: int, client_id: int, version: int) -> tuple:
+    """Cache key for a client panel.
+
+    `version` is the clients.version column, read with the ownership check,
+    so a write through any worker moves every worker to a new key. The UTC
+    date is part of the key because panels show "days since last check-in",
+    which changes without any write; models.days_since counts calendar
+    days, so it only changes when the date does. coach_id scopes entries to
+    the coach whose ownership check produced them.
+    """
+    return (template_name, coach_id, client_id, version, datetime.utcnow().date())
+
+def client_etag(coach_id: int, client_id: int, version: int) -> str:
+    """Weak ETag for a client panel at a clients.version, the same in every worker"""
+    day = datetime.utcnow().date().isoformat()
+    return f'W/"{coach_id}-{client_id}-{version}-{day}"'
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    # No "*": it would match a client the coach has never been shown
+    if not if_none_match:
+        return False
+    # Weak comparison: W/ prefixes are ignored on both sides
+    wanted = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == wanted for tag in if_none_match.split(","))
+
+def get_fragment(key: tuple) -> str | None:
+    html = _fragments.get(key)
+    if html is not None:
+        _fragments.move_to_end(key)
+    return html
+
+def store_fragment(key: tuple, html: str):
+    """Cache a panel rendered from data read after its version.
+
+    A write landing mid-render only makes the HTML newer than its key, and
+    the next request reads the newer version anyway. Entries for older
+    versions or days are unreachable, so they go now rather than by LRU.
+    """
+    client_id = key[2]
+    keys = _keys_by_client.setdefault(client_id, set())
+    for old_key in [k for k in keys if k[3:] != key[3:]]:
+        keys.discard(old_key)
+        _fragments.pop(old_key, None)
+    _fragments[key] = html
+    _fragments.move_to_end(key)
+    keys.add(key)
+    while len(_fragments) > MAX_FRAGMENTS:
+        old_key, _ = _fragments.popitem(last=False)
+        keys = _keys_by_client.get(old_key[2])
+        if keys:
+            keys.discard(old_key)
+            if not keys:
+                del _keys_by_client[old_key[2]]
@@ -0,0 +1,156 @@
+"""Batches of check-ins, for group sessions, device syncs and spreadsheet imports.
+
+A batch is validated up front, its ownership is checked in one query, and it
+is written with one statement per table: an executemany INSERT for the
+check-ins and their weekly rollups, and one UPDATE that moves every
+client's last_checkin and bumps its version. Imports create their clients the same way.
+"""
+import math
+import os
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from sqlalchemy import insert, update, select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from models import Client, CheckIn
+from ownership_service import owned_client_ids
+from client_list_service import ClientSummary
+from rollup_service import record_checkins
+from deletion_service import UPLOAD_DIR
+
+MAX_BATCH = 500
+
+@dataclass(slots=True, frozen=True)
+class NewCheckIn:
+    client_id: int
+    created_at: datetime
+    weight: float | None = None
+    note: str = ""
+    photo: None = None  # batches carry no photos; checkin_item.html reads the field
+
+def _timestamp(value, now: datetime) -> datetime:
+    if not value:
+        return now
+    moment = datetime.fromisoformat(value)
+    # Devices send offsets; check-ins are stored as naive UTC
+    if moment.tzinfo:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    if moment > now:
+        raise ValueError(f"created_at {value} is in the future")
+    return moment
+
+def parse_weight(value) -> float | None:
+    """A weight from a form or JSON value; None when blank. Raises ValueError
+    for anything that isn't a finite number."""
+    if value in (None, ""):
+        return None
+    weight = float(value)
+    # float() takes "nan" and "inf", which would poison every trend and average
+    if not math.isfinite(weight):
+        raise ValueError(f"weight {value!r} is not a number")
+    return weight
+
+def parse_checkins(items, now: datetime) -> list[NewCheckIn]:
+    """Validate a batch of dicts with client_id and optional weight, note and
+    created_at (ISO 8601, not after `now`). Raises ValueError naming the
+    first bad entry.
+    Returns the check-ins oldest first."""
+    if not isinstance(items, list) or not items:
+        raise ValueError("Expected a non-empty list of check-ins")
+    if len(items) > MAX_BATCH:
+        raise ValueError(f"At most {MAX_BATCH} check-ins per request")
+
+    entries = []
+    for position, item in enumerate(items):
+        try:
+            entries.append(NewCheckIn(
+                client_id=int(item["client_id"]),
+                created_at=_timestamp(item.get("created_at"), now),
+                weight=parse_weight(item.get("weight")),
+                note=str(item.get("note") or ""),
+            ))
+        except KeyError as e:
+            raise ValueError(f"Check-in {position}: missing {e}")
+        except (AttributeError, TypeError, ValueError) as e:
+            raise ValueError(f"Check-in {position}: {e}")
+    return sorted(entries, key=lambda entry: entry.created_at)
+
+def photo_checkins(client_id: int):
+    """Select the id, photo and created_at of a client's check-ins with a photo, newest first"""
+    return (
+        select(CheckIn.id, CheckIn.photo, CheckIn.created_at)
+        .where(CheckIn.client_id == client_id, CheckIn.photo.is_not(None))
+        .order_by(CheckIn.created_at.desc())
+    )
+
+def write_photo(filename: str, content: bytes):
+    """Save a check-in photo; blocking, so callers on the event loop use a thread"""
+    with open(os.path.join(UPLOAD_DIR, filename), "wb") as f:
+        f.write(content)
+
+async def unowned_client_ids(db: AsyncSession, coach_id: int, entries: list[NewCheckIn]) -> list[int]:
+    """Client ids in the batch that aren't the coach's, from one query"""
+    client_ids = sorted({entry.client_id for entry in entries})
+    owned = set((await db.execute(owned_client_ids(coach_id, client_ids))).scalars())
+    return [client_id for client_id in client_ids if client_id not in owned]
+
+async def insert_checkins(db: AsyncSession, entries: list[NewCheckIn]) -> tuple[list[ClientSummary], dict[int, int]]:
+    """Write an ownership-checked batch and commit.
+
+    Returns the updated sidebar rows and each client's new version.
+    """
+    rows = [
+        {"client_id": e.client_id, "created_at": e.created_at, "weight": e.weight, "note": e.note}
+        for e in entries
+    ]
+    await db.execute(insert(CheckIn), rows)
+    await record_checkins(db, rows)
+
+    # Latest check-in per client, one index seek each, so a backdated sync can't move it backwards
+    latest = select(func.max(CheckIn.created_at)).where(CheckIn.client_id == Client.id).scalar_subquery()
+    result = await db.execute(
+        update(Client)
+        .where(Client.id.in_({e.client_id for e in entries}))
+        .values(last_checkin=latest, version=Client.version + 1)
+        .returning(Client.id, Client.name, Client.last_checkin, Client.version),
+        execution_options={"synchronize_session": False},
+    )
+    rows = result.all()
+    await db.commit()
+    return [ClientSummary(*row[:3]) for row in rows], {row.id: row.version for row in rows}
+
+async def import_records(db: AsyncSession, coach_id: int, records: list[dict]) -> int:
+    """Insert parsed spreadsheet rows in one transaction; returns the number of clients.
+
+    Set-based like insert_checkins: one multi-row insert each for clients,
+    check-ins and rollups, rather than a flush per row. Commits even when there is nothing to insert,
+    since callers may have other changes pending.
+    """
+    if not records:
+        await db.commit()
+        return 0
+    
+    client_rows = [
+        {
+            "name": record["name"],
+            "email": record.get("email"),
+            "goal_weight": record.get("goal_weight"),
+            "notes": record.get("notes"),
+            "coach_id": coach_id
+        }
+        for record in records
+    ]
+    result = await db.execute(insert(Client).returning(Client.id, sort_by_parameter_order=True), client_rows)
+    client_ids = result.scalars().all()
+    
+    created_at = datetime.utcnow()
+    checkin_rows = [
+        {"client_id": client_id, "weight": record["weight"], "note": "Imported from spreadsheet", "created_at": created_at}
+        for client_id, record in zip(client_ids, records)
+        if record.get("weight")
+    ]
+    if checkin_rows:
+        await db.execute(insert(CheckIn), checkin_rows)
+        await record_checkins(db, checkin_rows)
+    
+    await db.commit()
+    return len(client_ids)
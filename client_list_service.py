@@ -0,0 +1,115 @@
+import base64
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from sqlalchemy import select, and_, or_
+from models import Client, days_since
+
+PAGE_SIZE = 50
+
+# sort key -> (column, descending)
+# "risk" puts the longest-inactive clients first, "recent" the freshest check-ins
+SORT_KEYS = {
+    "name": (Client.name, False),
+    "recent": (Client.last_checkin, True),
+    "risk": (Client.last_checkin, False),
+}
+DEFAULT_SORT = "name"
+
+@dataclass(slots=True, frozen=True)
+class ClientSummary:
+    """The columns a sidebar row renders, read without building a Client entity"""
+    id: int
+    name: str
+    last_checkin: datetime | None
+
+    def days_since_checkin(self):
+        return days_since(self.last_checkin)
+
+    def is_at_risk(self, threshold_days=5):
+        return self.days_since_checkin() >= threshold_days
+
+def normalize_sort(sort: str) -> str:
+    return sort if sort in SORT_KEYS else DEFAULT_SORT
+
+def encode_cursor(client: ClientSummary, sort: str) -> str:
+    """Encode the sort, and the sort value and id of the last row on a page, into an opaque token"""
+    column, _ = SORT_KEYS[sort]
+    value = getattr(client, column.key)
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    raw = json.dumps([sort, value, client.id]).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+def decode_cursor(cursor: str, sort: str) -> tuple:
+    """Inverse of encode_cursor. Returns None for a missing token.
+
+    Raises ValueError for a malformed token or one made under another sort,
+    whose position means nothing in this ordering.
+    """
+    if not cursor:
+        return None
+    try:
+        cursor_sort, value, last_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if value is not None and SORT_KEYS[sort][0] is Client.last_checkin:
+            value = datetime.fromisoformat(value)
+        last_id = int(last_id)
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+    if cursor_sort != sort:
+        raise ValueError(f"Cursor was made for sort {cursor_sort!r}, not {sort!r}")
+    return value, last_id
+
+def _after_cursor(column, descending: bool, value, last_id: int):
+    """Keyset condition for rows after (value, last_id) in the page ordering.
+
+    SQLite sorts NULLs first ascending and last descending, so a NULL sort
+    value needs its own branch.
+    """
+    if descending:
+        if value is None:
+            return and_(column.is_(None), Client.id < last_id)
+        return or_(
+            column < value,
+            and_(column == value, Client.id < last_id),
+            column.is_(None),
+        )
+    if value is None:
+        return or_(
+            and_(column.is_(None), Client.id > last_id),
+            column.is_not(None),
+        )
+    return or_(column > value, and_(column == value, Client.id > last_id))
+
+def client_page_query(coach_id: int, q: str = "", sort: str = DEFAULT_SORT, cursor: str = ""):
+    """Build a select for one page of a coach's clients.
+
+    Fetches PAGE_SIZE + 1 rows so the caller can tell whether another page
+    follows. Raises ValueError for a cursor decode_cursor rejects.
+    """
+    sort = normalize_sort(sort)
+    column, descending = SORT_KEYS[sort]
+
+    query = select(Client.id, Client.name, Client.last_checkin).where(Client.coach_id == coach_id)
+    if q:
+        query = query.where(Client.name.ilike(f"%{q}%"))
+
+    after = decode_cursor(cursor, sort)
+    if after:
+        query = query.where(_after_cursor(column, descending, *after))
+
+    if descending:
+        query = query.order_by(column.desc(), Client.id.desc())
+    else:
+        query = query.order_by(column.asc(), Client.id.asc())
+
+    return query.limit(PAGE_SIZE + 1)
+
+def split_page(rows: list, sort: str) -> tuple[list, str | None]:
+    """Trim the look-ahead row and return (page of ClientSummary, next_cursor)"""
+    sort = normalize_sort(sort)
+    clients = [ClientSummary(*row) for row in rows]
+    if len(clients) <= PAGE_SIZE:
+        return clients, None
+    page = clients[:PAGE_SIZE]
+    return page, encode_cursor(page[-1], sort)
@@ -0,0 +1,144 @@
+"""Smaller responses on the wire.
+
+Templates lose their indentation and blank lines when they're compiled, so
+the trimming costs nothing per render and cached fragments are stored
+already trimmed. Responses of at least MIN_BYTES are then compressed with
+brotli or gzip, whichever the client accepts and prefers. Brotli needs the
+optional `brotli` package; without it only gzip is offered.
+"""
+import os
+import re
+import zlib
+from jinja2.ext import Extension
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", 512))  # below this the headers cost more than they save
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 4  # for responses rendered per request; 11 is for static assets built ahead of time
+COMPRESSIBLE_TYPES = ("text/html", "text/csv", "text/plain", "text/css", "application/json",
+                      "application/x-ndjson", "application/javascript", "text/javascript", "image/svg+xml")
+
+_INDENT = re.compile(r"^[ \t]+", re.MULTILINE)
+_BLANK_LINES = re.compile(r"\n{2,}")
+# A line of nothing but control tags or a comment renders empty, so its newline
+# goes too. Tags that output text (include, block, call) keep theirs.
+_TAG_LINE = re.compile(r"^((?:\{%-?\s*(?!include|block|call)(?:(?!%\}).)*%\}|\{#(?:(?!#\}).)*#\})+)\n", re.MULTILINE)
+
+class StripIndentation(Extension):
+    """Strip leading whitespace and empty lines from template source.
+
+    Line breaks between text are kept, so words and attributes stay
+    separated. No template has whitespace-sensitive literal text (<pre>, or
+    multi-line <textarea> contents); values rendered into them are untouched.
+    """
+    def preprocess(self, source, name, filename=None):
+        source = _INDENT.sub("", source.replace("\r\n", "\n"))
+        return _BLANK_LINES.sub("\n", _TAG_LINE.sub(r"\1", source))
+
+class _Gzip:
+    def __init__(self):
+        self._compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        # Streamed chunks are flushed so each reaches the client as it's produced
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+class _Brotli:
+    def __init__(self):
+        self._compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        output = self._compressor.process(data)
+        return output + (self._compressor.finish() if final else self._compressor.flush())
+
+# In order of preference when the client rates them equally
+ENCODERS = {"br": _Brotli, "gzip": _Gzip} if brotli else {"gzip": _Gzip}
+
+def negotiate(accept_encoding: str) -> str | None:
+    """The coding to use for an Accept-Encoding header, or None for identity"""
+    weights = {}
+    for part in accept_encoding.lower().split(","):
+        coding, _, params = part.partition(";")
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[coding.strip()] = weight
+    best, best_weight = None, 0.0
+    for coding in ENCODERS:
+        weight = weights.get(coding, weights.get("*", 0.0))
+        if weight > best_weight:
+            best, best_weight = coding, weight
+    return best
+
+def _compressible(headers: MutableHeaders) -> bool:
+    content_type = headers.get("content-type", "")
+    # text/event-stream is left alone: each event must reach the tab as it's sent
+    return "content-encoding" not in headers and content_type.startswith(COMPRESSIBLE_TYPES)
+
+class CompressionMiddleware:
+    """Compress responses of MIN_BYTES or more, including streamed ones"""
+    def __init__(self, app, min_bytes: int = MIN_BYTES):
+        self.app = app
+        self.min_bytes = min_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+
+        coding = negotiate(Headers(scope=scope).get("accept-encoding", ""))
+        start = None
+        pending, pending_bytes = [], 0
+        encoder = None
+
+        async def send_compressed(message):
+            nonlocal start, pending_bytes, encoder
+            if message["type"] == "http.response.start":
+                if _compressible(MutableHeaders(scope=message)):
+                    # Held back until enough body has arrived to decide
+                    start = message
+                else:
+                    await send(message)
+                return
+            if message["type"] != "http.response.body" or (start is None and encoder is None):
+                await send(message)
+                return
+
+            more_body = message.get("more_body", False)
+            if start is not None:
+                # Responses through the timing middleware always arrive as a stream,
+                # so size is judged on what has arrived, not on more_body
+                pending.append(message.get("body", b""))
+                pending_bytes += len(pending[-1])
+                if more_body and pending_bytes < self.min_bytes:
+                    return
+                message = {"type": "http.response.body", "body": b"".join(pending), "more_body": more_body}
+                pending.clear()
+                if pending_bytes >= self.min_bytes:
+                    headers = MutableHeaders(scope=start)
+                    headers.add_vary_header("Accept-Encoding")
+                    if coding:
+                        encoder = ENCODERS[coding]()
+                        headers["Content-Encoding"] = coding
+                        del headers["Content-Length"]
+                        # The compressed bytes differ, so a strong validator no longer holds
+                        etag = headers.get("etag")
+                        if etag and not etag.startswith("W/"):
+                            headers["ETag"] = f"W/{etag}"
+                await send(start)
+                start = None
+
+            if encoder:
+                message = {"type": "http.response.body", "body": encoder.compress(message.get("body", b""), not more_body), "more_body": more_body}
+            await send(message)
+
+        await self.app(scope, receive, send_compressed)
@@ -1,8 +1,10 @@
+import os
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 
-DATABASE_URL = "sqlite+aiosqlite:///./coachkit.db"
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite+aiosqlite:///./coachkit.db")
 
-engine = create_async_engine(DATABASE_URL, echo=True)
+# Statement logging is opt-in; per-request query counts and timings are on /metrics
+engine = create_async_engine(DATABASE_URL, echo=os.getenv("SQL_ECHO") == "1")
 async_session = async_sessionmaker(engine, expire_on_commit=False)
 
 async def get_db():
@@ -0,0 +1,47 @@
+"""Set-based deletes of clients and everything under them.
+
+The ORM cascade on Client.checkins loads every check-in into the session and
+deletes them one at a time. Here each table is cleared with a single
+DELETE ... WHERE client_id IN (...), so the cost no longer grows with the
+Python work per row. Photo files are removed afterwards, off the request.
+"""
+import os
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession
+from models import Client, CheckIn, CheckInWeekly
+from ownership_service import owned_client_ids
+
+UPLOAD_DIR = "static/uploads"  # where checkin_service.write_photo saves them
+
+async def delete_owned_clients(db: AsyncSession, coach_id: int, client_ids: list[int]) -> tuple[list[int], list[str]]:
+    """Delete the coach's clients among client_ids, with their check-ins and rollups.
+
+    Runs in the caller's transaction. Returns the ids actually deleted
+    (others belong to another coach or don't exist) and the photo filenames
+    their check-ins referenced.
+    """
+    owned = owned_client_ids(coach_id, client_ids)
+    # Nothing deleted here is in the session; syncing it would fetch every deleted key
+    unsynced = {"synchronize_session": False}
+    # Check-ins with photos go first, so RETURNING only carries the filenames
+    photos = (await db.execute(
+        delete(CheckIn)
+        .where(CheckIn.client_id.in_(owned), CheckIn.photo.is_not(None))
+        .returning(CheckIn.photo),
+        execution_options=unsynced,
+    )).scalars().all()
+    await db.execute(delete(CheckIn).where(CheckIn.client_id.in_(owned)), execution_options=unsynced)
+    await db.execute(delete(CheckInWeekly).where(CheckInWeekly.client_id.in_(owned)), execution_options=unsynced)
+    deleted = (await db.execute(
+        delete(Client).where(Client.id.in_(client_ids), Client.coach_id == coach_id).returning(Client.id),
+        execution_options=unsynced,
+    )).scalars().all()
+    return deleted, photos
+
+def remove_photos(filenames: list[str]):
+    """Delete uploaded photo files; ones already gone are skipped, so a retry is safe"""
+    for filename in filenames:
+        try:
+            os.remove(os.path.join(UPLOAD_DIR, os.path.basename(filename)))
+        except FileNotFoundError:
+            pass
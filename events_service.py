@@ -0,0 +1,81 @@
+"""Per-coach server-sent events.
+
+Write paths publish HTML made of hx-swap-oob fragments to the coach's
+channel; every open dashboard holds a GET /events stream and swaps them in.
+The tab that made the change already has the fragment from its own
+response, so publishers pass its tab id to skip it.
+
+Like the job queue, channels live in this process: a coach's tabs only hear
+about writes handled by the worker their stream is connected to.
+"""
+import asyncio
+from dataclasses import dataclass, field
+
+QUEUE_SIZE = 100  # undelivered messages per stream before it resyncs
+KEEPALIVE = 15  # seconds between comments that keep proxies from closing an idle stream
+EVENT = "update"  # the event name the dashboard's sse-swap listens for
+
+@dataclass(eq=False)
+class Subscriber:
+    tab_id: str
+    queue: asyncio.Queue = field(default_factory=lambda: asyncio.Queue(QUEUE_SIZE))
+    overflowed: bool = False
+
+_channels: dict[int, set[Subscriber]] = {}
+
+def subscribe(coach_id: int, tab_id: str) -> Subscriber:
+    subscriber = Subscriber(tab_id)
+    _channels.setdefault(coach_id, set()).add(subscriber)
+    return subscriber
+
+def unsubscribe(coach_id: int, subscriber: Subscriber):
+    channel = _channels.get(coach_id)
+    if channel is None:
+        return
+    channel.discard(subscriber)
+    if not channel:
+        del _channels[coach_id]
+
+def has_listeners(coach_id: int, skip_tab: str | None = None) -> bool:
+    """Whether anyone but skip_tab would receive a publish; lets callers skip rendering"""
+    return any(s.tab_id != skip_tab for s in _channels.get(coach_id, ()))
+
+def publish(coach_id: int, html: str, skip_tab: str | None = None):
+    """Queue html for every stream of the coach except skip_tab's"""
+    for subscriber in _channels.get(coach_id, ()):
+        if subscriber.tab_id == skip_tab or subscriber.overflowed:
+            continue
+        try:
+            subscriber.queue.put_nowait(html)
+        except asyncio.QueueFull:
+            # Dropping one fragment would leave the tab silently stale, so the
+            # backlog is discarded and the stream tells the tab to resync instead
+            subscriber.overflowed = True
+
+def format_event(data: str, event: str = EVENT) -> str:
+    """One SSE message; multi-line data becomes one data: line per line"""
+    lines = "".join(f"data: {line}\n" for line in data.splitlines() or [""])
+    return f"event: {event}\n{lines}\n"
+
+async def stream(coach_id: int, tab_id: str, resync_html: str):
+    """Subscribe and yield SSE messages until the client disconnects.
+
+    resync_html is sent in place of a backlog that overflowed the queue.
+    """
+    subscriber = subscribe(coach_id, tab_id)
+    try:
+        while True:
+            if subscriber.overflowed:
+                while not subscriber.queue.empty():
+                    subscriber.queue.get_nowait()
+                subscriber.overflowed = False
+                yield format_event(resync_html)
+                continue
+            try:
+                html = await asyncio.wait_for(subscriber.queue.get(), KEEPALIVE)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            yield format_event(html)
+    finally:
+        unsubscribe(coach_id, subscriber)
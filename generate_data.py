@@ -0,0 +1,215 @@
+"""Generate a large synthetic CoachKit database.
+
+    python generate_data.py --database coachkit-large.db --coaches 10 --clients 500 --days 1095
+
+Rows go straight into SQLite with executemany and journaling off, bypassing
+the ORM, so tens of millions of check-ins take minutes rather than hours.
+Run it against a scratch file: ids continue from whatever is already there,
+but the pragmas trade crash safety for speed. Point the app at the result
+with DATABASE_URL=sqlite+aiosqlite:///./coachkit-large.db.
+"""
+import argparse
+import random
+import sqlite3
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine
+from models import Base
+from rollup_service import rebuild_weekly_rollups
+from auth_service import hash_password
+
+DEFAULT_PASSWORD = "password"
+BATCH_SIZE = 50_000
+
+FIRST_NAMES = ["Alex", "Sam", "Jordan", "Taylor", "Morgan", "Casey", "Riley", "Jamie", "Avery", "Quinn",
+               "Drew", "Harper", "Rowan", "Emery", "Dakota", "Reese", "Parker", "Skyler", "Logan", "Kendall",
+               "Maria", "James", "Priya", "Wei", "Fatima", "Diego", "Aisha", "Noah", "Olivia", "Hiro"]
+LAST_NAMES = ["Smith", "Johnson", "Chen", "Garcia", "Patel", "Kim", "Nguyen", "Brown", "Lopez", "Davis",
+              "Wilson", "Moore", "Clark", "Lewis", "Walker", "Young", "King", "Wright", "Hill", "Green",
+              "Okafor", "Silva", "Cohen", "Novak", "Haddad", "Tanaka", "Murphy", "Rossi", "Singh", "Ali"]
+NOTES = ["Good session", "Felt tired today", "Hit a new PR", "Travel week", "Back on track",
+         "Sore from leg day", "Meal prep went well", "Rough week at work", None, None, None]
+CLIENT_NOTES = ["Wants to lose weight before a wedding", "Training for a half marathon", "Knee injury, low impact only",
+                "Prefers morning sessions", "Vegetarian", None]
+
+def _timestamp(day_prefix: str, rng: random.Random) -> str:
+    # Same text layout SQLAlchemy writes for DateTime on SQLite, so ordering and parsing match
+    return f"{day_prefix} {rng.randint(6, 21):02d}:{rng.randint(0, 59):02d}:{rng.randint(0, 59):02d}.{rng.randint(0, 999999):06d}"
+
+def coach_email(coach_id: int) -> str:
+    return f"coach{coach_id}@synthetic.local"
+
+def _next_id(conn, table: str) -> int:
+    return (conn.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table}").fetchone()[0]) + 1
+
+def client_checkins(rng: random.Random, client_id: int, day_prefixes: list, start_day: int, end_day: int,
+                    adherence: float, photo_rate: float, next_checkin_id: int) -> tuple[list, str | None, float]:
+    """Simulate one client's check-ins between start_day and end_day.
+
+    Weight drifts toward the goal at a client-specific weekly rate, stalls
+    during plateaus, and carries day-to-day noise. Check-in probability is
+    per client, lower at weekends, with occasional multi-week gaps.
+    Returns (rows, last check-in timestamp, goal weight).
+    """
+    start_weight = min(max(rng.gauss(185, 32), 105), 380)
+    if rng.random() < 0.8:
+        goal = start_weight - rng.uniform(8, min(70, start_weight - 100))
+    else:
+        goal = start_weight + rng.uniform(5, 25)
+    weekly_rate = rng.uniform(0.3, 1.6)
+    direction = -1 if goal < start_weight else 1
+
+    # Beta keeps each client's propensity in (0, 1) around the requested mean
+    concentration = 6
+    propensity = rng.betavariate(max(adherence, 0.01) * concentration, max(1 - adherence, 0.01) * concentration)
+
+    rows = []
+    last = None
+    true_weight = start_weight
+    plateau_until = -1
+    gap_until = -1
+    checkin_id = next_checkin_id
+    for day in range(start_day, end_day):
+        # Underlying weight moves every day whether or not the client checks in
+        if day >= plateau_until:
+            if rng.random() < 0.01:
+                plateau_until = day + rng.randint(10, 42)
+            elif (goal - true_weight) * direction > 0:
+                true_weight += direction * weekly_rate / 7
+            else:
+                true_weight += rng.gauss(0.02, 0.05)
+
+        if day < gap_until:
+            continue
+        if rng.random() < 0.004:
+            gap_until = day + rng.randint(5, 28)
+            continue
+
+        chance = propensity * (0.6 if day % 7 in (5, 6) else 1.0)
+        if rng.random() >= chance:
+            continue
+
+        created = _timestamp(day_prefixes[day], rng)
+        weight = round(true_weight + rng.gauss(0, 0.9), 1) if rng.random() < 0.85 else None
+        photo = f"synthetic-{checkin_id}.jpg" if rng.random() < photo_rate else None
+        rows.append((checkin_id, client_id, rng.choice(NOTES), weight, photo, created))
+        checkin_id += 1
+        last = created
+
+    return rows, last, goal
+
+def generate(path: str, coaches: int = 10, clients: int = 500, days: int = 1095, adherence: float = 0.6,
+             churn: float = 0.3, photo_rate: float = 0.05, seed: int = 1, log=print) -> dict:
+    """Write synthetic coaches, clients and check-ins into the SQLite file at `path`.
+
+    `clients` is per coach. Clients join at a random point in the window and
+    a `churn` fraction of them stop checking in before the end.
+    """
+    rng = random.Random(seed)
+
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    engine.dispose()
+
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=OFF")
+    conn.execute("PRAGMA synchronous=OFF")
+    conn.execute("PRAGMA cache_size=-200000")
+
+    # History ends yesterday so no generated timestamp lands in the future
+    today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    first_day = today - timedelta(days=days)
+    day_prefixes = [(first_day + timedelta(days=d)).strftime("%Y-%m-%d") for d in range(days)]
+    now_text = datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S.%f")
+
+    # bcrypt is deliberately slow; every generated coach shares one hash
+    password_hash = hash_password(DEFAULT_PASSWORD)
+    coach_id = _next_id(conn, "coaches")
+    client_id = _next_id(conn, "clients")
+    checkin_id = _next_id(conn, "checkins")
+    first_coach_id = coach_id
+
+    started = time.perf_counter()
+    client_rows = []
+    checkin_rows = []
+    total_clients = 0
+    total_checkins = 0
+
+    def flush():
+        conn.executemany("INSERT INTO clients (id, coach_id, name, email, last_checkin, status, goal_weight, notes) "
+                         "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", client_rows)
+        conn.executemany("INSERT INTO checkins (id, client_id, note, weight, photo, created_at) "
+                         "VALUES (?, ?, ?, ?, ?, ?)", checkin_rows)
+        conn.commit()
+        client_rows.clear()
+        checkin_rows.clear()
+
+    for _ in range(coaches):
+        conn.execute(
+            "INSERT INTO coaches (id, name, email, password_hash, created_at) VALUES (?, ?, ?, ?, ?)",
+            (coach_id, f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}", coach_email(coach_id),
+             password_hash, now_text),
+        )
+        for _ in range(clients):
+            start_day = rng.randint(0, max(int(days * 0.8), 0))
+            end_day = rng.randint(start_day, days) if rng.random() < churn else days
+            rows, last, goal = client_checkins(rng, client_id, day_prefixes, start_day, end_day,
+                                               adherence, photo_rate, checkin_id)
+            checkin_rows.extend(rows)
+            checkin_id += len(rows)
+
+            client_rows.append((
+                client_id, coach_id,
+                f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+                f"client{client_id}@synthetic.local",
+                last or _timestamp(day_prefixes[min(start_day, days - 1)], rng),
+                "on_track",
+                round(goal, 1),
+                rng.choice(CLIENT_NOTES),
+            ))
+            client_id += 1
+            total_clients += 1
+            total_checkins += len(rows)
+
+            if len(checkin_rows) >= BATCH_SIZE:
+                flush()
+                log(f"  {total_clients:,} clients, {total_checkins:,} check-ins ({time.perf_counter() - started:.0f}s)")
+        coach_id += 1
+
+    flush()
+    conn.close()
+
+    # Bulk rows bypass the per-check-in rollup upserts
+    engine = create_engine(f"sqlite:///{path}")
+    with engine.begin() as sa_conn:
+        rebuild_weekly_rollups(sa_conn)
+    engine.dispose()
+
+    return {
+        "coaches": coaches,
+        "first_coach_id": first_coach_id,
+        "clients": total_clients,
+        "checkins": total_checkins,
+        "seconds": round(time.perf_counter() - started, 1),
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a large synthetic CoachKit database")
+    parser.add_argument("--database", default="coachkit-synthetic.db", help="SQLite file to write")
+    parser.add_argument("--coaches", type=int, default=10)
+    parser.add_argument("--clients", type=int, default=500, help="clients per coach")
+    parser.add_argument("--days", type=int, default=1095, help="length of the check-in history")
+    parser.add_argument("--adherence", type=float, default=0.6, help="mean daily check-in probability")
+    parser.add_argument("--churn", type=float, default=0.3, help="fraction of clients who stop checking in")
+    parser.add_argument("--photo-rate", type=float, default=0.05, help="fraction of check-ins with a photo")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    summary = generate(args.database, args.coaches, args.clients, args.days, args.adherence,
+                       args.churn, args.photo_rate, args.seed)
+    print(f"Wrote {summary['clients']:,} clients and {summary['checkins']:,} check-ins "
+          f"for {summary['coaches']} coaches to {args.database} in {summary['seconds']}s "
+          f"(password for every coach: {DEFAULT_PASSWORD})")
+
+if __name__ == "__main__":
+    main()
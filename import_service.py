@@ -1,23 +1,32 @@
-import pandas as pd
-import anthropic
-import os
+import io
 import json
-from dotenv import load_dotenv
+from typing import TYPE_CHECKING
+from metrics_service import timed
+from registry_service import get
 
-load_dotenv()
+if TYPE_CHECKING:
+    import pandas as pd
 
-client = anthropic.Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
+def read_spreadsheet(source: str | bytes, filename: str | None = None) -> "pd.DataFrame":
+    """Read a CSV, Excel or NDJSON file into a DataFrame.
 
-def read_spreadsheet(file_path: str) -> pd.DataFrame:
-    """Read CSV or Excel file into a DataFrame"""
-    if file_path.endswith('.csv'):
-        return pd.read_csv(file_path)
-    elif file_path.endswith(('.xlsx', '.xls')):
-        return pd.read_excel(file_path)
+    source is a path, or the file's bytes with its name passed as filename
+    (the extension picks the format).
+    """
+    pd = get("pandas")
+    name = filename or source
+    if isinstance(source, bytes):
+        source = io.BytesIO(source)
+    if name.endswith('.csv'):
+        return pd.read_csv(source)
+    elif name.endswith(('.xlsx', '.xls')):
+        return pd.read_excel(source)
+    elif name.endswith(('.ndjson', '.jsonl')):
+        return pd.read_json(source, lines=True)
     else:
-        raise ValueError("Unsupported file format. Use CSV or Excel.")
+        raise ValueError("Unsupported file format. Use CSV, Excel or NDJSON.")
 
-def analyze_columns(df: pd.DataFrame) -> dict:
+def analyze_columns(df: "pd.DataFrame") -> dict:
     """Use Claude to figure out which columns map to which fields"""
     
     # Get sample data for Claude to analyze
@@ -56,11 +65,13 @@ Respond with ONLY a JSON object in this exact format, no other text:
 If you can't find a matching column, use null for that field.
 For name, if there are separate first/last name columns, pick the one that seems like full name or first name."""
 
-    message = client.messages.create(
-        model="claude-sonnet-4-20250514",
-        max_tokens=500,
-        messages=[{"role": "user", "content": prompt}]
-    )
+    client = get("anthropic")
+    with timed("llm"):
+        message = client.messages.create(
+            model="claude-sonnet-4-20250514",
+            max_tokens=500,
+            messages=[{"role": "user", "content": prompt}]
+        )
     
     response_text = message.content[0].text
     
@@ -78,8 +89,9 @@ For name, if there are separate first/last name columns, pick the one that seems
     
     return mapping
 
-def preview_import(df: pd.DataFrame, mapping: dict) -> list[dict]:
+def preview_import(df: "pd.DataFrame", mapping: dict) -> list[dict]:
     """Generate a preview of what will be imported"""
+    pd = get("pandas")
     previews = []
     
     for _, row in df.head(10).iterrows():
@@ -95,8 +107,9 @@ def preview_import(df: pd.DataFrame, mapping: dict) -> list[dict]:
     
     return previews
 
-def parse_spreadsheet_for_import(df: pd.DataFrame, mapping: dict) -> list[dict]:
+def parse_spreadsheet_for_import(df: "pd.DataFrame", mapping: dict) -> list[dict]:
     """Parse entire spreadsheet into importable records"""
+    pd = get("pandas")
     records = []
     
     for _, row in df.iterrows():
@@ -0,0 +1,62 @@
+"""Uploaded spreadsheets held between the analyze and confirm steps of an import.
+
+The upload is stored in the database under a random token and the preview
+form carries only that token, so confirm can land on any worker or node
+that shares the database. A session belongs to one coach, expires after
+SESSION_TTL, and expired sessions are swept whenever a new one is created.
+"""
+import os
+import secrets
+from datetime import datetime, timedelta
+from fastapi import UploadFile
+from sqlalchemy import select, delete
+from sqlalchemy.ext.asyncio import AsyncSession
+from models import ImportSession
+
+MAX_BYTES = int(os.getenv("IMPORT_MAX_BYTES", 5 * 1024 * 1024))
+SESSION_TTL = int(os.getenv("IMPORT_SESSION_TTL", 60 * 60))  # seconds
+CHUNK_BYTES = 64 * 1024
+
+async def read_upload(upload: UploadFile, limit: int = MAX_BYTES) -> bytes:
+    """The uploaded file's bytes; raises ValueError once they pass `limit`.
+
+    Starlette has already spooled the whole request body by now, so this
+    caps what is held in memory and stored, not what is received.
+    """
+    chunks, size = [], 0
+    while chunk := await upload.read(CHUNK_BYTES):
+        size += len(chunk)
+        if size > limit:
+            raise ValueError(f"File is too large. The limit is {limit // (1024 * 1024)} MB.")
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+def _cutoff() -> datetime:
+    return datetime.utcnow() - timedelta(seconds=SESSION_TTL)
+
+def expired_sessions():
+    """Delete statement for sessions past their TTL"""
+    return delete(ImportSession).where(ImportSession.created_at < _cutoff())
+
+async def create_session(db: AsyncSession, coach_id: int, filename: str, data: bytes) -> str:
+    """Store an upload and return its token"""
+    await db.execute(expired_sessions())
+    token = secrets.token_urlsafe(32)
+    db.add(ImportSession(token=token, coach_id=coach_id, filename=filename, data=data))
+    await db.commit()
+    return token
+
+async def load_session(db: AsyncSession, coach_id: int, token: str) -> ImportSession | None:
+    """The coach's unexpired session for token; another coach's looks missing"""
+    result = await db.execute(
+        select(ImportSession).where(
+            ImportSession.token == token,
+            ImportSession.coach_id == coach_id,
+            ImportSession.created_at >= _cutoff(),
+        )
+    )
+    return result.scalar_one_or_none()
+
+async def delete_session(db: AsyncSession, coach_id: int, token: str):
+    """Delete a session in the caller's transaction, so it goes with whatever consumed it"""
+    await db.execute(delete(ImportSession).where(ImportSession.token == token, ImportSession.coach_id == coach_id))
@@ -0,0 +1,160 @@
+"""Background jobs, with their state in the database.
+
+Routes hand slow work (LLM calls, spreadsheet imports, file cleanup) to submit() and
+return a polling fragment at once; worker tasks started with the app run
+the job, and the browser polls GET /jobs/{id} until the result replaces the
+fragment. Each job type has its own queue, worker count (its concurrency
+limit) and retry policy.
+
+The work runs in the process that accepted it, but the statuses pollers
+show (retrying, done, failed) and the result are written to the jobs
+table, so a poll can land on any worker or node sharing the database. Polls
+for a job still running here are answered from memory. A job whose process
+stops before it finishes stays unfinished until swept after JOB_TTL.
+"""
+import asyncio
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable
+from sqlalchemy import select, insert, update, delete
+from sqlalchemy.exc import OperationalError
+from database import async_session
+from models import BackgroundJob
+from metrics_service import start_request, record_request
+from ai_service import retryable_errors
+
+JOB_TTL = 60 * 60  # seconds a job stays pollable after it was submitted
+
+@dataclass(frozen=True)
+class JobType:
+    workers: int
+    retries: int = 0
+    # Exception types, or a function returning them for types from lazily imported modules
+    retry_on: tuple | Callable[[], tuple] = (Exception,)
+    backoff: float = 1.0  # seconds before the first retry, doubled after each
+
+JOB_TYPES = {
+    # SQLite has one writer, so imports run one at a time; "database is locked" is worth a retry
+    "import": JobType(workers=1, retries=2, retry_on=(OperationalError,)),
+    # On top of the SDK's own retries, for outages longer than its backoff
+    "llm": JobType(workers=4, retries=2, retry_on=retryable_errors, backoff=5.0),
+    # Removing photos of deleted check-ins; skipping missing files makes a retry safe
+    "cleanup": JobType(workers=1, retries=2, retry_on=(OSError,)),
+}
+
+# A job returns the HTML that replaces its polling fragment, plus response headers
+JobResult = tuple[str, dict]
+
+@dataclass
+class Job:
+    """A queued job as its worker sees it; pollers read the BackgroundJob row"""
+    type: str
+    coach_id: int
+    run: Callable[[], Awaitable[JobResult]]
+    label: str
+    modal: bool = False  # polls from inside #modal-container
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    status: str = "queued"  # queued, running, retrying, done, failed
+    attempts: int = 0
+    error: str | None = None
+
+# Unfinished jobs of this process, so their polls skip the database
+_running: dict[str, Job] = {}
+_queues: dict[str, asyncio.Queue] = {}
+_workers: list[asyncio.Task] = []
+
+def retry_errors(job_type: str) -> tuple:
+    """The exceptions a job type retries on, for jobs that catch the rest themselves"""
+    retry_on = JOB_TYPES[job_type].retry_on
+    return retry_on() if callable(retry_on) else retry_on
+
+def expired_jobs():
+    """Delete statement for jobs past their TTL"""
+    return delete(BackgroundJob).where(BackgroundJob.created_at < datetime.utcnow() - timedelta(seconds=JOB_TTL))
+
+async def _save(job_id: str, **values):
+    async with async_session() as db:
+        await db.execute(update(BackgroundJob).where(BackgroundJob.id == job_id).values(**values))
+        await db.commit()
+
+async def submit(job_type: str, coach_id: int, run: Callable[[], Awaitable[JobResult]], label: str, modal: bool = False) -> Job:
+    """Record and queue `run` (a no-argument coroutine function) and return its Job"""
+    if job_type not in _queues:
+        raise RuntimeError(f"No workers for job type {job_type!r}; is the app started?")
+    job = Job(type=job_type, coach_id=coach_id, run=run, label=label, modal=modal)
+    async with async_session() as db:
+        await db.execute(expired_jobs())
+        await db.execute(insert(BackgroundJob).values(id=job.id, coach_id=coach_id, type=job_type, label=label, modal=modal))
+        await db.commit()
+    _running[job.id] = job
+    _queues[job_type].put_nowait(job)
+    return job
+
+async def get_job(job_id: str, coach_id: int) -> Job | BackgroundJob | None:
+    """A job by id, only if it belongs to the coach"""
+    job = _running.get(job_id)
+    if job is not None:
+        return job if job.coach_id == coach_id else None
+    async with async_session() as db:
+        result = await db.execute(
+            select(BackgroundJob).where(BackgroundJob.id == job_id, BackgroundJob.coach_id == coach_id)
+        )
+        return result.scalar_one_or_none()
+
+async def _execute(job: Job, policy: JobType):
+    while True:
+        job.attempts += 1
+        job.status = "running"
+        # Not recorded: pollers show the same spinner for queued and running,
+        # and every write waits on SQLite's one writer
+        try:
+            html, headers = await job.run()
+            break
+        except retry_errors(job.type) as e:
+            if job.attempts > policy.retries:
+                job.status, job.error = "failed", str(e)
+                await _save(job.id, status=job.status, attempts=job.attempts, error=job.error)
+                return
+            job.status = "retrying"
+            await _save(job.id, status=job.status, attempts=job.attempts)
+            await asyncio.sleep(policy.backoff * 2 ** (job.attempts - 1))
+        except Exception as e:
+            job.status, job.error = "failed", str(e)
+            await _save(job.id, status=job.status, attempts=job.attempts, error=job.error)
+            return
+    # Outside the try: a failed status write mustn't run the job again. The
+    # local status changes last; once done, polls need the stored result.
+    await _save(job.id, status="done", attempts=job.attempts, html=html, headers=headers)
+    job.status = "done"
+
+async def _worker(job_type: str, policy: JobType):
+    queue = _queues[job_type]
+    while True:
+        job = await queue.get()
+        # Jobs show up on /metrics as method="JOB", route=<type>
+        timings = start_request()
+        start = time.perf_counter()
+        try:
+            await _execute(job, policy)
+        except Exception as e:
+            # Its status couldn't be recorded; keep the worker alive for the next job
+            job.status, job.error = "failed", str(e)
+        # Its row is final now (or as final as it will get)
+        _running.pop(job.id, None)
+        record_request("JOB", job_type, 200 if job.status == "done" else 500, time.perf_counter() - start, timings)
+        queue.task_done()
+
+def start_workers():
+    for job_type, policy in JOB_TYPES.items():
+        _queues[job_type] = asyncio.Queue()
+        for _ in range(policy.workers):
+            _workers.append(asyncio.create_task(_worker(job_type, policy)))
+
+async def stop_workers():
+    for task in _workers:
+        task.cancel()
+    await asyncio.gather(*_workers, return_exceptions=True)
+    _workers.clear()
+    _queues.clear()
@@ -1,38 +1,180 @@
+from dotenv import load_dotenv
+# Settings such as DATABASE_URL are read at import time, so .env goes first
+load_dotenv()
+
 from fastapi import FastAPI, Request, Depends, Form, File, UploadFile
-from fastapi.responses import HTMLResponse, RedirectResponse
+from fastapi.responses import HTMLResponse, RedirectResponse, Response, PlainTextResponse, StreamingResponse, JSONResponse
 from fastapi.templating import Jinja2Templates
 from fastapi.staticfiles import StaticFiles
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import selectinload, contains_eager, load_only
 from sqlalchemy import select
-from models import Base, Coach, Client, CheckIn
+from jinja2 import Environment, FileSystemLoader, FileSystemBytecodeCache, select_autoescape
+from models import Base, Coach, Client, CheckIn, create_missing_columns, create_missing_indexes
+import asyncio
 import uuid
 import os
-import tempfile
 import json
+import time
+from datetime import datetime
+from typing import Awaitable, Callable
 from ai_service import generate_reengagement_message
 from import_service import read_spreadsheet, analyze_columns, preview_import, parse_spreadsheet_for_import
 from auth_service import hash_password, verify_password, create_token, get_current_coach_id
-
-from database import engine, get_db
+from client_list_service import client_page_query, split_page, normalize_sort, DEFAULT_SORT, ClientSummary
+from ownership_service import owned_client, owned_client_ids, owned_client_version, owned_checkin, stamp_owned_client
+from deletion_service import delete_owned_clients, remove_photos
+from checkin_service import parse_checkins, parse_weight, unowned_client_ids, insert_checkins, import_records, write_photo, photo_checkins
+from cache_service import fragment_key, get_fragment, store_fragment, drop_fragments, client_etag, etag_matches
+from analytics_service import cohort_analytics
+from trend_service import coach_trends, summarize_trends
+from series_service import load_series, append_weight, drop_series
+from job_service import submit, get_job, retry_errors, expired_jobs, start_workers, stop_workers
+from events_service import has_listeners, publish, stream
+from rollup_service import record_checkin, backfill_weekly_rollups, checkin_count
+from export_service import DATASETS, FORMATS, stream_export
+from import_session_service import read_upload, create_session, load_session, delete_session, expired_sessions
+from compression_service import CompressionMiddleware, StripIndentation
+from metrics_service import start_request, record_request, server_timing, instrument_engine, render_prometheus, TimedTemplate
+
+from database import engine, get_db, async_session
 
 app = FastAPI()
 app.mount("/static", StaticFiles(directory="static"), name="static")
-templates = Jinja2Templates(directory="templates")
+# Built here rather than from Jinja2Templates options, which newer Starlette rejects.
+# Compiled templates are shared on disk so new workers skip recompiling. Cache
+# keys don't cover extensions, so this pattern keeps untrimmed bytecode out.
+template_env = Environment(
+    loader=FileSystemLoader("templates"),
+    autoescape=select_autoescape(),
+    extensions=[StripIndentation],
+    bytecode_cache=FileSystemBytecodeCache(pattern="__coachkit_stripped_%s.cache"),
+)
+template_env.template_class = TimedTemplate
+templates = Jinja2Templates(env=template_env)
+instrument_engine(engine)
 
 @app.on_event("startup")
 async def startup():
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(create_missing_columns)
+        await conn.run_sync(create_missing_indexes)
+        await conn.run_sync(backfill_weekly_rollups)
+        await conn.execute(expired_sessions())
+        await conn.execute(expired_jobs())
+    start_workers()
+
+@app.on_event("shutdown")
+async def shutdown():
+    await stop_workers()
+
+@app.middleware("http")
+async def record_timings(request: Request, call_next):
+    timings = start_request()
+    start = time.perf_counter()
+    response = await call_next(request)
+    elapsed = time.perf_counter() - start
+
+    # Label by route template so /client/1 and /client/2 share a series
+    route = request.scope.get("route")
+    record_request(request.method, route.path if route else "unmatched", response.status_code, elapsed, timings)
+    response.headers["Server-Timing"] = server_timing(elapsed, timings)
+    return response
+
+# Added last, so it wraps the timing middleware too
+app.add_middleware(CompressionMiddleware)
+
+@app.get("/metrics")
+async def metrics():
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
 
 # Auth dependency
 async def require_auth(request: Request, db: AsyncSession = Depends(get_db)):
     coach_id = get_current_coach_id(request)
     if not coach_id:
         return None
-    result = await db.execute(select(Coach).where(Coach.id == coach_id))
+    # Routes only read the id and name; skip the password hash and email
+    result = await db.execute(select(Coach).where(Coach.id == coach_id).options(load_only(Coach.id, Coach.name)))
     return result.scalar_one_or_none()
 
+# Client panels are served from the fragment cache until the client is written to.
+# The version comes from the database on every request, with the ownership
+# check, so a write handled by another worker retires this worker's copy and
+# its ETag. A conditional GET is answered after that one primary-key query,
+# so a guessed ETag can't reveal another coach's client or its version.
+# Weight charts and goal progress read the cached weight series, so only the
+# panel that lists check-ins loads them; others add narrow queries of their
+# own through `context`.
+async def render_client_panel(request: Request, db: AsyncSession, coach_id: int, client_id: int, template_name: str,
+                              with_checkins: bool = False,
+                              context: Callable[[AsyncSession, int], Awaitable[dict]] | None = None):
+    version = (await db.execute(owned_client_version(coach_id, client_id))).scalar_one_or_none()
+    if version is None:
+        return HTMLResponse("Client not found", status_code=404)
+    etag = client_etag(coach_id, client_id, version)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "private, no-cache"})
+    key = fragment_key(template_name, coach_id, client_id, version)
+    html = get_fragment(key)
+    if html is None:
+        query = owned_client(coach_id, client_id)
+        if with_checkins:
+            query = query.options(selectinload(Client.checkins))
+        client = (await db.execute(query)).scalar_one_or_none()
+        if not client:
+            return HTMLResponse("Client not found", status_code=404)
+        series = await load_series(db, client_id, version)
+        extra = await context(db, client_id) if context else {}
+        html = templates.get_template(template_name).render({"request": request, "client": client, "series": series, **extra})
+        store_fragment(key, html)
+    return HTMLResponse(html, headers={"ETag": etag, "Cache-Control": "private, no-cache"})
+
+def render_fragment(request: Request, template_name: str, **context) -> str:
+    return templates.get_template(template_name).render({"request": request, **context})
+
+# Slow work runs as a background job; the response is a fragment that polls for the result
+def job_response(request: Request, job):
+    return templates.TemplateResponse("partials/job_status.html", {
+        "request": request,
+        "job": job
+    })
+
+# Other tabs of the coach get the change as out-of-band fragments over /events.
+# The tab that made it is skipped: its own response already carries the update.
+def publish_update(request: Request, coach_id: int, **context):
+    skip_tab = request.headers.get("x-tab-id")
+    if has_listeners(coach_id, skip_tab):
+        publish(coach_id, render_fragment(request, "partials/live_update.html", **context), skip_tab)
+
+@app.get("/events")
+async def events(request: Request, tab: str = ""):
+    coach_id = get_current_coach_id(request)
+    if not coach_id:
+        return HTMLResponse("Unauthorized", status_code=401)
+    
+    # Sent instead of a backlog the tab fell too far behind on
+    resync = render_fragment(request, "partials/live_update.html", list_changed=True)
+    return StreamingResponse(
+        stream(coach_id, tab, resync),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.get("/jobs/{job_id}")
+async def job_status(request: Request, job_id: str):
+    coach_id = get_current_coach_id(request)
+    if not coach_id:
+        return HTMLResponse("Unauthorized", status_code=401)
+    
+    job = await get_job(job_id, coach_id)
+    if not job:
+        return HTMLResponse("Job not found", status_code=404)
+    
+    if job.status == "done":
+        return HTMLResponse(job.html, headers=job.headers)
+    return job_response(request, job)
+
 # Auth routes
 @app.get("/login")
 async def login_page(request: Request):
@@ -106,21 +248,23 @@ async def home(request: Request, db: AsyncSession = Depends(get_db)):
     if not coach:
         return RedirectResponse(url="/login", status_code=303)
     
-    result = await db.execute(
-        select(Client).where(Client.coach_id == coach.id)
-    )
-    clients = result.scalars().all()
+    result = await db.execute(client_page_query(coach.id))
+    clients, next_cursor = split_page(result.all(), DEFAULT_SORT)
     
     return templates.TemplateResponse("dashboard.html", {
         "request": request,
+        "tab_id": uuid.uuid4().hex,
         "coach_name": coach.name,
-        "clients": clients
+        "clients": clients,
+        "next_cursor": next_cursor,
+        "q": "",
+        "sort": DEFAULT_SORT
     })
 
 @app.get("/client/new")
 async def new_client_form(request: Request, db: AsyncSession = Depends(get_db)):
-    coach = await require_auth(request, db)
-    if not coach:
+    coach_id = get_current_coach_id(request)
+    if not coach_id:
         return RedirectResponse(url="/login", status_code=303)
     
     return templates.TemplateResponse("partials/client_form.html", {
@@ -129,24 +273,11 @@ async def new_client_form(request: Request, db: AsyncSession = Depends(get_db)):
 
 @app.get("/client/{client_id}")
 async def get_client(request: Request, client_id: int, db: AsyncSession = Depends(get_db)):
-    coach = await require_auth(request, db)
-    if not coach:
+    coach_id = get_current_coach_id(request)
+    if not coach_id:
         return RedirectResponse(url="/login", status_code=303)
     
-    result = await db.execute(
-        select(Client)
-        .where(Client.id == client_id, Client.coach_id == coach.id)
-        .options(selectinload(Client.checkins))
-    )
-    client = result.scalar_one_or_none()
-    
-    if not client:
-        return HTMLResponse("Client not found", status_code=404)
-    
-    return templates.TemplateResponse("partials/client_detail.html", {
-        "request": request,
-        "client": client
-    })
+    return await render_client_panel(request, db, coach_id, client_id, "partials/client_detail.html", with_checkins=True)
 
 @app.post("/client")
 async def create_client(
@@ -155,11 +286,11 @@ async def create_client(
     email: str = Form(...),
     db: AsyncSession = Depends(get_db)
 ):
-    coach = await require_auth(request, db)
-    if not coach:
+    coach_id = get_current_coach_id(request)
+    if not coach_id:
         return HTMLResponse("Unauthorized", status_code=401)
     
-    client = Client(name=name, email=email, coach_id=coach.id)
+    client = Client(name=name, email=email, coach_id=coach_id)
     db.add(client)
     await db.commit()
 
@@ -167,13 +298,15 @@ async def create_client(
         select(Client).where(Client.id == client.id).options(selectinload(Client.checkins))
     )
     client = result.scalar_one()
+    series = await load_series(db, client.id, client.version)
+    publish_update(request, coach_id, added=client)
 
-    response = templates.TemplateResponse("partials/client_detail.html", {
+    return templates.TemplateResponse("partials/client_detail.html", {
         "request": request,
-        "client": client
+        "client": client,
+        "series": series,
+        "oob_row": True
     })
-    response.headers["HX-Trigger"] = "clientListChanged"
-    return response
 
 @app.post("/client/{client_id}/checkin")
 async def create_checkin(
@@ -184,62 +317,138 @@ async def create_checkin(
     photo: UploadFile = File(None),
     db: AsyncSession = Depends(get_db)
 ):
-    coach = await require_auth(request, db)
-    if not coach:
+    coach_id = get_current_coach_id(request)
+    if not coach_id:
         return HTMLResponse("Unauthorized", status_code=401)
     
-    # Verify client belongs to coach
-    result = await db.execute(
-        select(Client).where(Client.id == client_id, Client.coach_id == coach.id)
-    )
-    client = result.scalar_one_or_none()
-    if not client:
-        return HTMLResponse("Client not found", status_code=404)
+    # Form floats accept "inf" and "nan"; batches go through the same check
+    try:
+        weight = parse_weight(weight)
+    except ValueError as e:
+        return HTMLResponse(str(e), status_code=422)
     
     photo_filename = None
     if photo and photo.filename:
+        # Saved before the UPDATE below takes SQLite's write lock, so other
+        # writers don't wait on the upload; checked for ownership first
+        if (await db.execute(owned_client_ids(coach_id, [client_id]))).scalar_one_or_none() is None:
+            return HTMLResponse("Client not found", status_code=404)
         ext = os.path.splitext(photo.filename)[1]
         photo_filename = f"{uuid.uuid4()}{ext}"
-        file_path = f"static/uploads/{photo_filename}"
-        with open(file_path, "wb") as f:
-            content = await photo.read()
-            f.write(content)
+        content = await photo.read()
+        await asyncio.to_thread(write_photo, photo_filename, content)
+
+    # Stamp explicitly: the column default isn't applied until flush
+    created_at = datetime.utcnow()
+    # Ownership check and last_checkin update in one statement
+    result = await db.execute(stamp_owned_client(coach_id, client_id, created_at))
+    row = result.one_or_none()
+    if not row:
+        if photo_filename:
+            # Deleted since the check above
+            await asyncio.to_thread(remove_photos, [photo_filename])
+        return HTMLResponse("Client not found", status_code=404)
+    *summary, version = row
+    client = ClientSummary(*summary)
     
     checkin = CheckIn(
         client_id=client_id, 
         note=note, 
         weight=weight,
-        photo=photo_filename
+        photo=photo_filename,
+        created_at=created_at
     )
     db.add(checkin)
-    client.last_checkin = checkin.created_at
+    await record_checkin(db, checkin)
     await db.commit()
+    append_weight(client_id, version, checkin.created_at, weight)
     await db.refresh(checkin)
+    publish_update(request, coach_id, rows=[client], checkins=[checkin], changed_ids=[client_id])
 
     response = templates.TemplateResponse("partials/checkin_item.html", {
         "request": request,
-        "checkin": checkin
+        "checkin": checkin,
+        "client": client
     })
     response.headers["HX-Trigger"] = "checkinAdded"
     return response
 
+# Group sessions post the sidebar's selected clients with one note; device
+# syncs post a JSON list of {client_id, weight, note, created_at}
+@app.post("/checkins/bulk")
+async def bulk_checkins(request: Request, db: AsyncSession = Depends(get_db)):
+    coach_id = get_current_coach_id(request)
+    if not coach_id:
+        return HTMLResponse("Unauthorized", status_code=401)
+    
+    is_json = request.headers.get("content-type", "").startswith("application/json")
+    
+    def error(message: str, status_code: int):
+        if is_json:
+            return JSONResponse({"error": message}, status_code=status_code)
+        return HTMLResponse(message, status_code=status_code)
+    
+    try:
+        if is_json:
+            items = await request.json()
+        else:
+            form = await request.form()
+            items = [{"client_id": client_id, "note": form.get("note", "")} for client_id in form.getlist("client_ids")]
+        entries = parse_checkins(items, datetime.utcnow())
+    except ValueError as e:
+        return error(str(e), 422)
+    
+    missing = await unowned_client_ids(db, coach_id, entries)
+    if missing:
+        return error(f"Clients not found: {', '.join(map(str, missing))}", 404)
+    
+    clients, versions = await insert_checkins(db, entries)
+    for entry in entries:
+        append_weight(entry.client_id, versions[entry.client_id], entry.created_at, entry.weight)
+    
+    changed_ids = [client.id for client in clients]
+    publish_update(request, coach_id, rows=clients, checkins=entries, changed_ids=changed_ids)
+    
+    if is_json:
+        return JSONResponse({
+            "created": len(entries),
+            "clients": [{"id": client.id, "last_checkin": client.last_checkin.isoformat()} for client in clients]
+        })
+    # One response updates every affected row and any open client panel
+    return templates.TemplateResponse("partials/live_update.html", {
+        "request": request,
+        "rows": clients,
+        "checkins": entries,
+        "changed_ids": changed_ids
+    })
+
 @app.get("/clients/search")
-async def search_clients(request: Request, q: str = "", db: AsyncSession = Depends(get_db)):
-    coach = await require_auth(request, db)
-    if not coach:
+async def search_clients(
+    request: Request,
+    q: str = "",
+    sort: str = DEFAULT_SORT,
+    cursor: str = "",
+    db: AsyncSession = Depends(get_db)
+):
+    coach_id = get_current_coach_id(request)
+    if not coach_id:
         return HTMLResponse("Unauthorized", status_code=401)
     
-    result = await db.execute(
-        select(Client).where(
-            Client.coach_id == coach.id,
-            Client.name.ilike(f"%{q}%")
-        )
-    )
-    clients = result.scalars().all()
+    sort = normalize_sort(sort)
+    try:
+        query = client_page_query(coach_id, q, sort, cursor)
+    except ValueError as e:
+        return HTMLResponse(str(e), status_code=400)
+    result = await db.execute(query)
+    clients, next_cursor = split_page(result.all(), sort)
 
     return templates.TemplateResponse("partials/client_list.html", {
         "request": request,
-        "clients": clients
+        "clients": clients,
+        "next_cursor": next_cursor,
+        "q": q,
+        "sort": sort,
+        "is_next_page": bool(cursor)
     })
 
 @app.delete("/client/{client_id}")
@@ -248,33 +457,60 @@ async def delete_client(
     client_id: int,
     db: AsyncSession = Depends(get_db)
 ):
-    coach = await require_auth(request, db)
-    if not coach:
+    coach_id = get_current_coach_id(request)
+    if not coach_id:
         return HTMLResponse("Unauthorized", status_code=401)
     
-    result = await db.execute(
-        select(Client).where(Client.id == client_id, Client.coach_id == coach.id)
-    )
-    client = result.scalar_one_or_none()
+    deleted, photos = await delete_owned_clients(db, coach_id, [client_id])
+    await db.commit()
+    await clients_deleted(request, coach_id, deleted, photos)
+    
+    return templates.TemplateResponse("partials/client_placeholder.html", {
+        "request": request,
+        "deleted_client_ids": deleted
+    })
 
-    if client:
-        await db.delete(client)
-        await db.commit()
+@app.post("/clients/delete")
+async def delete_clients(
+    request: Request,
+    client_ids: list[int] = Form([]),
+    db: AsyncSession = Depends(get_db)
+):
+    coach_id = get_current_coach_id(request)
+    if not coach_id:
+        return HTMLResponse("Unauthorized", status_code=401)
     
-    response = templates.TemplateResponse("partials/client_placeholder.html", {
-        "request": request
+    deleted, photos = await delete_owned_clients(db, coach_id, client_ids) if client_ids else ([], [])
+    await db.commit()
+    await clients_deleted(request, coach_id, deleted, photos)
+    
+    return templates.TemplateResponse("partials/client_placeholder.html", {
+        "request": request,
+        "deleted_client_ids": deleted
     })
-    response.headers["HX-Trigger"] = "clientListChanged"
-    return response
+
+# Once a delete is committed: drop cached state, tell other tabs, and remove
+# photo files in the background
+async def clients_deleted(request: Request, coach_id: int, deleted: list[int], photos: list[str]):
+    for client_id in deleted:
+        drop_series(client_id)
+        drop_fragments(client_id)
+    if deleted:
+        publish_update(request, coach_id, deleted_ids=deleted)
+    if photos:
+        async def run():
+            await asyncio.to_thread(remove_photos, photos)
+            return "", {}
+        await submit("cleanup", coach_id, run, "Removing photos")
 
 @app.get("/client/{client_id}/delete-modal")
 async def delete_modal(request: Request, client_id: int, db: AsyncSession = Depends(get_db)):
-    coach = await require_auth(request, db)
-    if not coach:
+    coach_id = get_current_coach_id(request)
+    if not coach_id:
         return HTMLResponse("Unauthorized", status_code=401)
     
     result = await db.execute(
-        select(Client).where(Client.id == client_id, Client.coach_id == coach.id)
+        owned_client(coach_id, client_id).options(load_only(Client.id, Client.name))
     )
     client = result.scalar_one_or_none()
     
@@ -289,12 +525,12 @@ async def close_modal():
 
 @app.get("/client/{client_id}/edit-goal")
 async def edit_goal_form(request: Request, client_id: int, db: AsyncSession = Depends(get_db)):
-    coach = await require_auth(request, db)
-    if not coach:
+    coach_id = get_current_coach_id(request)
+    if not coach_id:
         return HTMLResponse("Unauthorized", status_code=401)
     
     result = await db.execute(
-        select(Client).where(Client.id == client_id, Client.coach_id == coach.id)
+        owned_client(coach_id, client_id)
     )
     client = result.scalar_one_or_none()
     
@@ -305,19 +541,11 @@ async def edit_goal_form(request: Request, client_id: int, db: AsyncSession = De
 
 @app.get("/client/{client_id}/goal")
 async def get_goal(request: Request, client_id: int, db: AsyncSession = Depends(get_db)):
-    coach = await require_auth(request, db)
-    if not coach:
+    coach_id = get_current_coach_id(request)
+    if not coach_id:
         return HTMLResponse("Unauthorized", status_code=401)
     
-    result = await db.execute(
-        select(Client).where(Client.id == client_id, Client.coach_id == coach.id).options(selectinload(Client.checkins))
-    )
-    client = result.scalar_one_or_none()
-    
-    return templates.TemplateResponse("partials/goal_display.html", {
-        "request": request,
-        "client": client
-    })
+    return await render_client_panel(request, db, coach_id, client_id, "partials/goal_display.html")
 
 @app.put("/client/{client_id}/goal")
 async def update_goal(
@@ -327,12 +555,17 @@ async def update_goal(
     notes: str = Form(""),
     db: AsyncSession = Depends(get_db)
 ):
-    coach = await require_auth(request, db)
-    if not coach:
+    coach_id = get_current_coach_id(request)
+    if not coach_id:
         return HTMLResponse("Unauthorized", status_code=401)
     
+    try:
+        goal_weight = parse_weight(goal_weight)
+    except ValueError as e:
+        return HTMLResponse(str(e), status_code=422)
+    
     result = await db.execute(
-        select(Client).where(Client.id == client_id, Client.coach_id == coach.id).options(selectinload(Client.checkins))
+        owned_client(coach_id, client_id)
     )
     client = result.scalar_one_or_none()
     
@@ -341,12 +574,16 @@ async def update_goal(
     
     client.goal_weight = goal_weight
     client.notes = notes
+    client.version = Client.version + 1
     await db.commit()
     await db.refresh(client)
+    series = await load_series(db, client_id, client.version)
+    publish_update(request, coach_id, changed_ids=[client_id])
     
     return templates.TemplateResponse("partials/goal_display.html", {
         "request": request,
-        "client": client
+        "client": client,
+        "series": series
     })
 
 @app.get("/photo/{filename}")
@@ -362,51 +599,75 @@ async def analytics_empty(request: Request):
         "request": request
     })
 
-@app.get("/client/{client_id}/analytics")
-async def client_analytics(request: Request, client_id: int, db: AsyncSession = Depends(get_db)):
-    coach = await require_auth(request, db)
-    if not coach:
+@app.get("/analytics/cohort")
+async def cohort_analytics_modal(request: Request, db: AsyncSession = Depends(get_db)):
+    coach_id = get_current_coach_id(request)
+    if not coach_id:
         return HTMLResponse("Unauthorized", status_code=401)
     
-    result = await db.execute(
-        select(Client).where(Client.id == client_id, Client.coach_id == coach.id).options(selectinload(Client.checkins))
-    )
-    client = result.scalar_one_or_none()
+    stats = await cohort_analytics(db, coach_id)
     
-    return templates.TemplateResponse("partials/analytics_tray.html", {
+    return templates.TemplateResponse("partials/cohort_analytics.html", {
         "request": request,
-        "client": client
+        "stats": stats
     })
 
-@app.get("/client/{client_id}/chart-modal")
-async def chart_modal(request: Request, client_id: int, db: AsyncSession = Depends(get_db)):
-    coach = await require_auth(request, db)
-    if not coach:
+@app.get("/analytics/trends")
+async def cohort_trends(request: Request, db: AsyncSession = Depends(get_db)):
+    coach_id = get_current_coach_id(request)
+    if not coach_id:
         return HTMLResponse("Unauthorized", status_code=401)
     
-    result = await db.execute(
-        select(Client).where(Client.id == client_id, Client.coach_id == coach.id).options(selectinload(Client.checkins))
+    trends = await coach_trends(db, coach_id)
+    plateau_ids = [client_id for client_id, trend in trends.items() if trend.plateau]
+    names = await db.execute(
+        select(Client.id, Client.name).where(Client.id.in_(plateau_ids)).order_by(Client.name).limit(10)
     )
-    client = result.scalar_one_or_none()
     
-    return templates.TemplateResponse("partials/chart_modal.html", {
+    return templates.TemplateResponse("partials/trend_summary.html", {
         "request": request,
-        "client": client
+        "summary": summarize_trends(trends),
+        "plateaued": [(client_id, name, trends[client_id]) for client_id, name in names.all()]
     })
 
+# The Stats tab's count comes from the weekly rollups and the Photos tab reads
+# three columns of the check-ins that have one, so no CheckIn entities load
+async def analytics_context(db: AsyncSession, client_id: int) -> dict:
+    return {
+        "checkin_count": (await db.execute(checkin_count(client_id))).scalar_one(),
+        "photos": (await db.execute(photo_checkins(client_id))).all(),
+    }
+
+@app.get("/client/{client_id}/analytics")
+async def client_analytics(request: Request, client_id: int, db: AsyncSession = Depends(get_db)):
+    coach_id = get_current_coach_id(request)
+    if not coach_id:
+        return HTMLResponse("Unauthorized", status_code=401)
+    
+    return await render_client_panel(request, db, coach_id, client_id, "partials/analytics_tray.html",
+                                     context=analytics_context)
+
+@app.get("/client/{client_id}/chart-modal")
+async def chart_modal(request: Request, client_id: int, db: AsyncSession = Depends(get_db)):
+    coach_id = get_current_coach_id(request)
+    if not coach_id:
+        return HTMLResponse("Unauthorized", status_code=401)
+    
+    return await render_client_panel(request, db, coach_id, client_id, "partials/chart_modal.html")
+
 @app.get("/checkin/{checkin_id}/photo-view")
 async def photo_view(request: Request, checkin_id: int, db: AsyncSession = Depends(get_db)):
-    coach = await require_auth(request, db)
-    if not coach:
+    coach_id = get_current_coach_id(request)
+    if not coach_id:
         return HTMLResponse("Unauthorized", status_code=401)
     
+    # The template shows the client's name, which comes back on the same join
     result = await db.execute(
-        select(CheckIn).where(CheckIn.id == checkin_id).options(selectinload(CheckIn.client))
+        owned_checkin(coach_id, checkin_id).options(contains_eager(CheckIn.client).load_only(Client.name))
     )
     checkin = result.scalar_one_or_none()
     
-    # Verify the checkin's client belongs to coach
-    if not checkin or checkin.client.coach_id != coach.id:
+    if not checkin:
         return HTMLResponse("Not found", status_code=404)
     
     return templates.TemplateResponse("partials/photo_view.html", {
@@ -420,51 +681,43 @@ async def generate_message(
     client_id: int,
     db: AsyncSession = Depends(get_db)
 ):
-    coach = await require_auth(request, db)
-    if not coach:
+    coach_id = get_current_coach_id(request)
+    if not coach_id:
         return HTMLResponse("Unauthorized", status_code=401)
     
     result = await db.execute(
-        select(Client).where(Client.id == client_id, Client.coach_id == coach.id).options(selectinload(Client.checkins))
+        owned_client(coach_id, client_id).options(selectinload(Client.checkins))
     )
     client = result.scalar_one_or_none()
     
     if not client:
         return HTMLResponse("Client not found", status_code=404)
     
-    message = generate_reengagement_message(
-        client_name=client.name,
-        days_inactive=client.days_since_checkin(),
-        notes=client.notes,
-        recent_checkins=list(client.checkins)
-    )
+    async def run():
+        # The SDK call blocks, so it runs on a thread
+        message = await asyncio.to_thread(
+            generate_reengagement_message,
+            client_name=client.name,
+            days_inactive=client.days_since_checkin(),
+            notes=client.notes,
+            recent_checkins=list(client.checkins)
+        )
+        return render_fragment(request, "partials/generated_message.html", client=client, message=message), {}
     
-    return templates.TemplateResponse("partials/generated_message.html", {
-        "request": request,
-        "client": client,
-        "message": message
-    })
+    return job_response(request, await submit("llm", coach_id, run, "Writing message"))
 
 @app.get("/client/{client_id}/at-risk-status")
 async def at_risk_status(request: Request, client_id: int, db: AsyncSession = Depends(get_db)):
-    coach = await require_auth(request, db)
-    if not coach:
+    coach_id = get_current_coach_id(request)
+    if not coach_id:
         return HTMLResponse("Unauthorized", status_code=401)
     
-    result = await db.execute(
-        select(Client).where(Client.id == client_id, Client.coach_id == coach.id).options(selectinload(Client.checkins))
-    )
-    client = result.scalar_one_or_none()
-    
-    return templates.TemplateResponse("partials/at_risk_status.html", {
-        "request": request,
-        "client": client
-    })
+    return await render_client_panel(request, db, coach_id, client_id, "partials/at_risk_status.html")
 
 @app.get("/import")
 async def import_page(request: Request, db: AsyncSession = Depends(get_db)):
-    coach = await require_auth(request, db)
-    if not coach:
+    coach_id = get_current_coach_id(request)
+    if not coach_id:
         return HTMLResponse("Unauthorized", status_code=401)
     
     return templates.TemplateResponse("partials/import_modal.html", {
@@ -477,85 +730,97 @@ async def analyze_import(
     file: UploadFile = File(...),
     db: AsyncSession = Depends(get_db)
 ):
-    coach = await require_auth(request, db)
-    if not coach:
+    coach_id = get_current_coach_id(request)
+    if not coach_id:
         return HTMLResponse("Unauthorized", status_code=401)
     
-    ext = os.path.splitext(file.filename)[1]
-    with tempfile.NamedTemporaryFile(delete=False, suffix=ext) as tmp:
-        content = await file.read()
-        tmp.write(content)
-        tmp_path = tmp.name
-    
     try:
-        df = read_spreadsheet(tmp_path)
-        mapping = analyze_columns(df)
-        preview = preview_import(df, mapping)
-        
-        return templates.TemplateResponse("partials/import_preview.html", {
-            "request": request,
-            "mapping": mapping,
-            "preview": preview,
-            "total_rows": len(df),
-            "tmp_path": tmp_path,
-            "filename": file.filename
-        })
-    except Exception as e:
-        os.unlink(tmp_path)
+        content = await read_upload(file)
+    except ValueError as e:
         return templates.TemplateResponse("partials/import_error.html", {
             "request": request,
             "error": str(e)
         })
+    # Stored where confirm can find it, whichever worker it lands on
+    import_token = await create_session(db, coach_id, file.filename, content)
+    
+    async def run():
+        try:
+            df = await asyncio.to_thread(read_spreadsheet, content, file.filename)
+            mapping = await asyncio.to_thread(analyze_columns, df)
+            preview = preview_import(df, mapping)
+        except retry_errors("llm"):
+            raise
+        except Exception as e:
+            async with async_session() as db:
+                await delete_session(db, coach_id, import_token)
+                await db.commit()
+            return render_fragment(request, "partials/import_error.html", error=str(e)), {}
+        
+        return render_fragment(
+            request,
+            "partials/import_preview.html",
+            mapping=mapping,
+            preview=preview,
+            total_rows=len(df),
+            import_token=import_token,
+            filename=file.filename
+        ), {}
+    
+    return job_response(request, await submit("llm", coach_id, run, "Analyzing spreadsheet", modal=True))
 
 @app.post("/import/confirm")
 async def confirm_import(
     request: Request,
-    tmp_path: str = Form(...),
-    mapping: str = Form(...),
-    db: AsyncSession = Depends(get_db)
+    import_token: str = Form(...),
+    mapping: str = Form(...)
 ):
-    coach = await require_auth(request, db)
-    if not coach:
+    coach_id = get_current_coach_id(request)
+    if not coach_id:
         return HTMLResponse("Unauthorized", status_code=401)
     
-    try:
-        mapping_dict = json.loads(mapping)
-        df = read_spreadsheet(tmp_path)
-        records = parse_spreadsheet_for_import(df, mapping_dict)
-        
-        imported_count = 0
-        for record in records:
-            client = Client(
-                name=record["name"],
-                email=record.get("email"),
-                goal_weight=record.get("goal_weight"),
-                notes=record.get("notes"),
-                coach_id=coach.id
-            )
-            db.add(client)
-            imported_count += 1
-            
-            if record.get("weight"):
-                await db.flush()
-                checkin = CheckIn(
-                    client_id=client.id,
-                    weight=record["weight"],
-                    note="Imported from spreadsheet"
-                )
-                db.add(checkin)
-        
-        await db.commit()
-        os.unlink(tmp_path)
-        
-        response = templates.TemplateResponse("partials/import_success.html", {
-            "request": request,
-            "count": imported_count
-        })
-        response.headers["HX-Trigger"] = "clientListChanged"
-        return response
+    async def run():
+        try:
+            mapping_dict = json.loads(mapping)
+            async with async_session() as db:
+                upload = await load_session(db, coach_id, import_token)
+                if upload is None:
+                    raise ValueError("This upload has expired. Please upload the file again.")
+                df = await asyncio.to_thread(read_spreadsheet, upload.data, upload.filename)
+                records = parse_spreadsheet_for_import(df, mapping_dict)
+                # Committed with the import, so a retried job can't import twice
+                await delete_session(db, coach_id, import_token)
+                imported_count = await import_records(db, coach_id, records)
+        except retry_errors("import"):
+            raise
+        except Exception as e:
+            return render_fragment(request, "partials/import_error.html", error=str(e)), {}
         
-    except Exception as e:
-        return templates.TemplateResponse("partials/import_error.html", {
-            "request": request,
-            "error": str(e)
-        })
\ No newline at end of file
+        publish_update(request, coach_id, list_changed=True)
+        html = render_fragment(request, "partials/import_success.html", count=imported_count)
+        return html, {"HX-Trigger": "clientListChanged"}
+    
+    return job_response(request, await submit("import", coach_id, run, "Importing clients", modal=True))
+
+# Export routes
+@app.get("/export/{dataset}.{fmt}")
+async def export(request: Request, dataset: str, fmt: str):
+    coach_id = get_current_coach_id(request)
+    if not coach_id:
+        return HTMLResponse("Unauthorized", status_code=401)
+    
+    if dataset not in DATASETS or fmt not in FORMATS:
+        return HTMLResponse("Export not found", status_code=404)
+    
+    async def body():
+        # A session of its own: the request's closes before the body is sent
+        async with async_session() as db:
+            async for chunk in stream_export(db, coach_id, dataset, fmt):
+                yield chunk
+    
+    filename = f"{dataset}-{datetime.utcnow():%Y-%m-%d}.{fmt}"
+    return StreamingResponse(
+        body(),
+        media_type=FORMATS[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
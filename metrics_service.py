@@ -0,0 +1,132 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from jinja2 import Template
+from sqlalchemy import event
+
+# Latency buckets in seconds, Prometheus style (cumulative, +Inf implied)
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+@dataclass
+class RequestTimings:
+    db_queries: int = 0
+    db_seconds: float = 0.0
+    template_seconds: float = 0.0
+    llm_seconds: float = 0.0
+
+@dataclass
+class RouteStats:
+    buckets: list
+    count: int = 0
+    seconds: float = 0.0
+    db_queries: int = 0
+    db_seconds: float = 0.0
+    template_seconds: float = 0.0
+    llm_seconds: float = 0.0
+
+# The request currently being served on this task, if any
+_current: ContextVar[RequestTimings | None] = ContextVar("request_timings", default=None)
+
+# (method, route path, status) -> stats
+_routes: dict[tuple, RouteStats] = {}
+
+def start_request() -> RequestTimings:
+    timings = RequestTimings()
+    _current.set(timings)
+    return timings
+
+def record_request(method: str, route: str, status: int, seconds: float, timings: RequestTimings):
+    stats = _routes.get((method, route, status))
+    if stats is None:
+        stats = _routes[(method, route, status)] = RouteStats(buckets=[0] * len(BUCKETS))
+    stats.count += 1
+    stats.seconds += seconds
+    stats.db_queries += timings.db_queries
+    stats.db_seconds += timings.db_seconds
+    stats.template_seconds += timings.template_seconds
+    stats.llm_seconds += timings.llm_seconds
+    for i, bound in enumerate(BUCKETS):
+        if seconds <= bound:
+            stats.buckets[i] += 1
+
+@contextmanager
+def timed(kind: str):
+    """Add the wall time of the block to the current request's `<kind>_seconds`"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings = _current.get()
+        if timings is not None:
+            field = f"{kind}_seconds"
+            setattr(timings, field, getattr(timings, field) + time.perf_counter() - start)
+
+def server_timing(total_seconds: float, timings: RequestTimings) -> str:
+    """Format a Server-Timing header value (durations in milliseconds)"""
+    parts = [
+        f"app;dur={total_seconds * 1000:.1f}",
+        f'db;dur={timings.db_seconds * 1000:.1f};desc="{timings.db_queries} queries"',
+        f"tpl;dur={timings.template_seconds * 1000:.1f}",
+    ]
+    if timings.llm_seconds:
+        parts.append(f"llm;dur={timings.llm_seconds * 1000:.1f}")
+    return ", ".join(parts)
+
+def instrument_engine(engine):
+    """Count and time every SQL statement against the request that issued it"""
+    sync_engine = getattr(engine, "sync_engine", engine)
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        timings = _current.get()
+        if timings is not None:
+            timings.db_queries += 1
+            timings.db_seconds += elapsed
+
+class TimedTemplate(Template):
+    """Template that reports its render time to the current request.
+
+    Only top-level renders go through render(); includes and extends render
+    inline, so nested templates aren't counted twice.
+    """
+    def render(self, *args, **kwargs):
+        with timed("template"):
+            return super().render(*args, **kwargs)
+
+def _labels(method: str, route: str, status: int) -> str:
+    route = route.replace("\\", "\\\\").replace('"', '\\"')
+    return f'method="{method}",route="{route}",status="{status}"'
+
+def render_prometheus() -> str:
+    """Render collected stats in the Prometheus text exposition format"""
+    lines = [
+        "# HELP coachkit_request_duration_seconds Request latency by route.",
+        "# TYPE coachkit_request_duration_seconds histogram",
+    ]
+    for (method, route, status), stats in sorted(_routes.items()):
+        labels = _labels(method, route, status)
+        for bound, count in zip(BUCKETS, stats.buckets):
+            lines.append(f'coachkit_request_duration_seconds_bucket{{{labels},le="{bound}"}} {count}')
+        lines.append(f'coachkit_request_duration_seconds_bucket{{{labels},le="+Inf"}} {stats.count}')
+        lines.append(f"coachkit_request_duration_seconds_sum{{{labels}}} {stats.seconds:.6f}")
+        lines.append(f"coachkit_request_duration_seconds_count{{{labels}}} {stats.count}")
+
+    counters = [
+        ("coachkit_db_queries_total", "SQL statements executed, by route.", "db_queries"),
+        ("coachkit_db_seconds_total", "Time spent executing SQL, by route.", "db_seconds"),
+        ("coachkit_template_seconds_total", "Time spent rendering templates, by route.", "template_seconds"),
+        ("coachkit_llm_seconds_total", "Time spent waiting on the LLM, by route.", "llm_seconds"),
+    ]
+    for name, help_text, field in counters:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} counter")
+        for (method, route, status), stats in sorted(_routes.items()):
+            lines.append(f"{name}{{{_labels(method, route, status)}}} {getattr(stats, field)}")
+
+    return "\n".join(lines) + "\n"
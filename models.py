@@ -1,6 +1,18 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Float
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Float, Index, LargeBinary, Boolean, JSON, inspect, text
+from sqlalchemy.schema import CreateColumn
 from sqlalchemy.orm import DeclarativeBase, relationship
 from datetime import datetime, timedelta
+from trend_service import client_trend
+
+def days_since(moment: datetime | None) -> int:
+    """Calendar days (UTC) since moment.
+
+    Counted by date, not by 24-hour periods, so the value only changes at
+    midnight: cached panels and ETags key on the UTC date and stay correct.
+    """
+    if not moment:
+        return 999
+    return (datetime.utcnow().date() - moment.date()).days
 
 class Base(DeclarativeBase):
     pass
@@ -18,6 +30,11 @@ class Coach(Base):
 
 class Client(Base):
     __tablename__ = "clients"
+    __table_args__ = (
+        # Back the sidebar sort keys so paginated list queries are index range scans
+        Index("ix_clients_coach_name", "coach_id", "name", "id"),
+        Index("ix_clients_coach_last_checkin", "coach_id", "last_checkin", "id"),
+    )
     
     id = Column(Integer, primary_key=True)
     coach_id = Column(Integer, ForeignKey("coaches.id"), nullable=False)
@@ -30,36 +47,32 @@ class Client(Base):
     goal_weight = Column(Float)
     notes = Column(Text)
 
+    # Incremented by every write to the client or its check-ins, in the same
+    # UPDATE; caches in every worker key on it
+    version = Column(Integer, nullable=False, default=0, server_default="0")
+
     coach = relationship("Coach", back_populates="clients")
     checkins = relationship("CheckIn", back_populates="client", order_by="desc(CheckIn.created_at)", cascade="all, delete-orphan")
+    weekly_rollups = relationship("CheckInWeekly", back_populates="client", cascade="all, delete-orphan")
 
     def days_since_checkin(self):
-        if not self.last_checkin:
-            return 999
-        delta = datetime.utcnow() - self.last_checkin
-        return delta.days
+        return days_since(self.last_checkin)
     
     def is_at_risk(self, threshold_days=5):
         return self.days_since_checkin() >= threshold_days
     
-    def current_weight(self):
-        for checkin in self.checkins:
-            if checkin.weight:
-                return checkin.weight
-        return None
+    # The series comes from series_service.load_series; check-ins may not be loaded
+    def current_weight(self, series):
+        return self.weight_trend(series).latest
     
-    def goal_progress(self):
-        current = self.current_weight()
-        if not current or not self.goal_weight:
-            return None
-        
-        starting = None
-        for checkin in reversed(self.checkins):
-            if checkin.weight:
-                starting = checkin.weight
-                break
-        
-        if not starting:
+    def weight_trend(self, series):
+        return client_trend(self, series)
+
+    def goal_progress(self, series):
+        # Start and latest weights come from the trend, cached per client version
+        trend = self.weight_trend(series)
+        current, starting = trend.latest, trend.start
+        if not current or not self.goal_weight or not starting:
             return None
         
         if starting == current:
@@ -81,6 +94,9 @@ class Client(Base):
 
 class CheckIn(Base):
     __tablename__ = "checkins"
+    __table_args__ = (
+        Index("ix_checkins_client_created", "client_id", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True)
     client_id = Column(Integer, ForeignKey("clients.id"), nullable=False)
@@ -89,4 +105,91 @@ class CheckIn(Base):
     photo = Column(String)
     created_at = Column(DateTime, default=datetime.utcnow)
 
-    client = relationship("Client", back_populates="checkins")
\ No newline at end of file
+    client = relationship("Client", back_populates="checkins")
+
+
+# Monday, so week indexes line up with ISO weeks
+WEEK_EPOCH = datetime(1970, 1, 5)
+
+class CheckInWeekly(Base):
+    """Per-client, per-ISO-week summary of check-ins, maintained on every insert"""
+    __tablename__ = "checkin_weekly"
+    # Clustered on (client_id, week): per-client range scans never touch a second b-tree
+    __table_args__ = {"sqlite_with_rowid": False}
+
+    client_id = Column(Integer, ForeignKey("clients.id"), primary_key=True)
+    week = Column(Integer, primary_key=True)  # whole weeks since WEEK_EPOCH
+    checkin_count = Column(Integer, nullable=False, default=0)
+    weight_count = Column(Integer, nullable=False, default=0)
+    weight_sum = Column(Float, nullable=False, default=0.0)
+    weight_min = Column(Float)
+    weight_max = Column(Float)
+    photo_count = Column(Integer, nullable=False, default=0)
+
+    client = relationship("Client", back_populates="weekly_rollups")
+
+    @property
+    def week_start(self):
+        return (WEEK_EPOCH + timedelta(weeks=self.week)).date()
+
+    @property
+    def avg_weight(self):
+        if not self.weight_count:
+            return None
+        return self.weight_sum / self.weight_count
+
+
+class ImportSession(Base):
+    """An uploaded spreadsheet held between the analyze and confirm steps of an import"""
+    __tablename__ = "import_sessions"
+    __table_args__ = (
+        # Expiry sweeps delete by age
+        Index("ix_import_sessions_created", "created_at"),
+    )
+
+    token = Column(String, primary_key=True)
+    coach_id = Column(Integer, ForeignKey("coaches.id"), nullable=False)
+    filename = Column(String, nullable=False)
+    data = Column(LargeBinary, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class BackgroundJob(Base):
+    """A background job's state and result, so any worker can answer a poll"""
+    __tablename__ = "jobs"
+    __table_args__ = (
+        # Expiry sweeps delete by age
+        Index("ix_jobs_created", "created_at"),
+    )
+
+    id = Column(String, primary_key=True)
+    coach_id = Column(Integer, ForeignKey("coaches.id"), nullable=False)
+    type = Column(String, nullable=False)
+    label = Column(String, nullable=False)
+    modal = Column(Boolean, default=False, nullable=False)
+    status = Column(String, default="queued", nullable=False)  # queued, running, retrying, done, failed
+    attempts = Column(Integer, default=0, nullable=False)
+    html = Column(Text)
+    headers = Column(JSON)
+    error = Column(Text)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+def create_missing_columns(connection):
+    """Add columns added after a table already exists (create_all skips them).
+
+    New columns need a server default or must be nullable, as for any ALTER TABLE ADD COLUMN.
+    """
+    inspector = inspect(connection)
+    for table in Base.metadata.sorted_tables:
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in existing:
+                ddl = CreateColumn(column).compile(dialect=connection.dialect)
+                connection.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {ddl}"))
+
+def create_missing_indexes(connection):
+    """Create indexes added after a table already exists (create_all skips them)"""
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(connection, checkfirst=True)
@@ -0,0 +1,44 @@
+"""Statements scoped to the authenticated coach.
+
+Each helper puts the ownership check in the WHERE clause of the statement
+that reads or writes the row, keyed on the coach id from the session token.
+Routes need neither a Coach load nor a separate lookup to authorize, and a
+row owned by another coach looks the same as a missing one.
+"""
+from datetime import datetime
+from sqlalchemy import select, update
+from models import Client, CheckIn
+
+def owned_client(coach_id: int, client_id: int):
+    """Select one of the coach's clients by id (primary-key lookup)"""
+    return select(Client).where(Client.id == client_id, Client.coach_id == coach_id)
+
+def owned_client_ids(coach_id: int, client_ids: list[int]):
+    """Select the ids among client_ids that belong to the coach; usable as an IN subquery"""
+    return select(Client.id).where(Client.id.in_(client_ids), Client.coach_id == coach_id)
+
+def owned_client_version(coach_id: int, client_id: int):
+    """Select the version of one of the coach's clients; no row means not found"""
+    return select(Client.version).where(Client.id == client_id, Client.coach_id == coach_id)
+
+def owned_checkin(coach_id: int, checkin_id: int):
+    """Select a check-in joined to its client, only if that client is the coach's"""
+    return (
+        select(CheckIn)
+        .join(CheckIn.client)
+        .where(CheckIn.id == checkin_id, Client.coach_id == coach_id)
+    )
+
+def stamp_owned_client(coach_id: int, client_id: int, moment: datetime):
+    """Set last_checkin on one of the coach's clients and bump its version.
+
+    Returns the row's id, name, last_checkin and new version, which is the
+    ownership check and the sidebar row data in one statement. No row means
+    not found.
+    """
+    return (
+        update(Client)
+        .where(Client.id == client_id, Client.coach_id == coach_id)
+        .values(last_checkin=moment, version=Client.version + 1)
+        .returning(Client.id, Client.name, Client.last_checkin, Client.version)
+    )
@@ -0,0 +1,55 @@
+"""Heavyweight dependencies, created on first use.
+
+pandas and the Anthropic SDK take longer to import than the rest of the app
+together. Only the import modal, the cohort analytics modal
+(/analytics/cohort) and the re-engagement button need them.
+Services ask the registry for them by name instead of importing them at
+module load, so workers start without paying for either.
+
+Benchmarks and scripts swap in stand-ins with override().
+"""
+import asyncio
+import importlib
+import os
+import threading
+from typing import Any, Callable
+
+_factories: dict[str, Callable[[], Any]] = {}
+_instances: dict[str, Any] = {}
+# Jobs call services from worker threads; two first uses mustn't build two clients
+_lock = threading.Lock()
+
+def register(name: str, factory: Callable[[], Any]):
+    _factories[name] = factory
+
+def get(name: str) -> Any:
+    """The named service, created by its factory on first call"""
+    try:
+        return _instances[name]
+    except KeyError:
+        pass
+    with _lock:
+        if name not in _instances:
+            _instances[name] = _factories[name]()
+        return _instances[name]
+
+async def load(name: str) -> Any:
+    """get() for the event loop: a first-time import runs in a thread"""
+    if name in _instances:
+        return _instances[name]
+    return await asyncio.to_thread(get, name)
+
+def override(name: str, instance: Any):
+    """Use instance for name from now on, whether or not the real one was created"""
+    with _lock:
+        _instances[name] = instance
+
+def is_loaded(name: str) -> bool:
+    return name in _instances
+
+def _anthropic_client():
+    import anthropic
+    return anthropic.Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
+
+register("pandas", lambda: importlib.import_module("pandas"))
+register("anthropic", _anthropic_client)
@@ -0,0 +1,121 @@
+"""Weekly check-in rollups.
+
+create_checkin and the spreadsheet import keep checkin_weekly current as
+they insert. To rebuild it from raw check-ins (after bulk loads such as
+generate_data.py, or if it drifts), run:
+
+    python rollup_service.py --rebuild
+"""
+import argparse
+from datetime import datetime
+from sqlalchemy import create_engine, delete, func, select, text
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from models import Base, CheckIn, CheckInWeekly, WEEK_EPOCH
+
+def week_index(moment: datetime) -> int:
+    return (moment - WEEK_EPOCH).days // 7
+
+def _rollup_values(client_id: int, created_at: datetime, weight: float | None, photo: str | None) -> dict:
+    # A weight of 0 means none was entered, as for the weight series, trends and exports
+    has_weight = bool(weight)
+    return {
+        "client_id": client_id,
+        "week": week_index(created_at),
+        "checkin_count": 1,
+        "weight_count": 1 if has_weight else 0,
+        "weight_sum": weight if has_weight else 0.0,
+        "weight_min": weight if has_weight else None,
+        "weight_max": weight if has_weight else None,
+        "photo_count": 1 if photo else 0,
+    }
+
+def _fold_into_existing(stmt):
+    new = stmt.excluded
+    # SQLite's two-argument min()/max() return NULL if either side is NULL
+    return stmt.on_conflict_do_update(
+        index_elements=[CheckInWeekly.client_id, CheckInWeekly.week],
+        set_={
+            "checkin_count": CheckInWeekly.checkin_count + new.checkin_count,
+            "weight_count": CheckInWeekly.weight_count + new.weight_count,
+            "weight_sum": CheckInWeekly.weight_sum + new.weight_sum,
+            "weight_min": func.min(func.coalesce(CheckInWeekly.weight_min, new.weight_min),
+                                   func.coalesce(new.weight_min, CheckInWeekly.weight_min)),
+            "weight_max": func.max(func.coalesce(CheckInWeekly.weight_max, new.weight_max),
+                                   func.coalesce(new.weight_max, CheckInWeekly.weight_max)),
+            "photo_count": CheckInWeekly.photo_count + new.photo_count,
+        },
+    )
+
+def record_checkin_stmt(client_id: int, created_at: datetime, weight: float | None, photo: str | None):
+    """Upsert that folds one check-in into its week's rollup row"""
+    return _fold_into_existing(insert(CheckInWeekly).values(**_rollup_values(client_id, created_at, weight, photo)))
+
+async def record_checkin(db: AsyncSession, checkin: CheckIn):
+    """Fold a new check-in into checkin_weekly in the caller's transaction.
+
+    created_at must already be set; the column default only fires at flush.
+    """
+    await db.execute(record_checkin_stmt(checkin.client_id, checkin.created_at, checkin.weight, checkin.photo))
+
+async def record_checkins(db: AsyncSession, checkins: list[dict]):
+    """Fold many new check-ins, as column dicts, into checkin_weekly with one executemany"""
+    if not checkins:
+        return
+    params = [_rollup_values(c["client_id"], c["created_at"], c.get("weight"), c.get("photo")) for c in checkins]
+    await db.execute(_fold_into_existing(insert(CheckInWeekly)), params)
+
+def checkin_count(client_id: int):
+    """Select a client's number of check-ins, summed over its weekly rows"""
+    return select(func.coalesce(func.sum(CheckInWeekly.checkin_count), 0)).where(CheckInWeekly.client_id == client_id)
+
+# Mirrors week_index() in SQL: whole weeks between the check-in's date and WEEK_EPOCH.
+# NULLIF drops zero weights, as _rollup_values does.
+REBUILD_SQL = text(f"""
+    INSERT INTO checkin_weekly
+        (client_id, week, checkin_count, weight_count, weight_sum, weight_min, weight_max, photo_count)
+    SELECT
+        client_id,
+        CAST((julianday(date(created_at)) - julianday('{WEEK_EPOCH:%Y-%m-%d}')) / 7 AS INTEGER) AS week,
+        COUNT(*),
+        COUNT(NULLIF(weight, 0)),
+        COALESCE(SUM(weight), 0),
+        MIN(NULLIF(weight, 0)),
+        MAX(NULLIF(weight, 0)),
+        COUNT(photo)
+    FROM checkins
+    GROUP BY client_id, week
+""")
+
+def rebuild_weekly_rollups(connection):
+    """Recompute checkin_weekly from scratch (sync connection)"""
+    connection.execute(delete(CheckInWeekly))
+    connection.execute(REBUILD_SQL)
+
+def backfill_weekly_rollups(connection):
+    """Populate checkin_weekly on databases created before it existed"""
+    has_rollups = connection.execute(text("SELECT 1 FROM checkin_weekly LIMIT 1")).first()
+    has_checkins = connection.execute(text("SELECT 1 FROM checkins LIMIT 1")).first()
+    if has_checkins and not has_rollups:
+        rebuild_weekly_rollups(connection)
+
+def main(argv=None):
+    from database import DATABASE_URL
+    parser = argparse.ArgumentParser(description="Maintain the checkin_weekly rollup table")
+    parser.add_argument("--rebuild", action="store_true", help="recompute every rollup from raw check-ins")
+    parser.add_argument("--database", default=DATABASE_URL.replace("+aiosqlite", ""), help="SQLAlchemy URL")
+    args = parser.parse_args(argv)
+    if not args.rebuild:
+        parser.print_help()
+        return
+
+    engine = create_engine(args.database)
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        rebuild_weekly_rollups(conn)
+        rows = conn.execute(text("SELECT COUNT(*) FROM checkin_weekly")).scalar()
+    engine.dispose()
+    print(f"Rebuilt {rows:,} weekly rollup rows")
+
+if __name__ == "__main__":
+    main()
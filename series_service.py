@@ -0,0 +1,131 @@
+import os
+from collections import OrderedDict
+from datetime import datetime
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Memory budget for cached series; 0 turns the cache off, and load_series
+# then queries on every call
+MAX_BYTES = int(os.getenv("SERIES_CACHE_BYTES", 16 * 1024 * 1024))
+ENTRY_OVERHEAD = 200  # rough size of the object and its dict slot
+
+class WeightSeries:
+    """One client's weigh-ins as parallel arrays, oldest first.
+
+    Times are datetime64[us]; weights are float32 and rounded to two
+    decimals on the way out, which hides float32 representation noise.
+    `version` is the clients.version read before the weigh-ins were.
+    """
+    __slots__ = ("times", "weights", "version")
+
+    def __init__(self, times: np.ndarray, weights: np.ndarray, version: int):
+        self.times = times
+        self.weights = weights
+        self.version = version
+
+    def __len__(self):
+        return len(self.times)
+
+    @property
+    def nbytes(self) -> int:
+        return self.times.nbytes + self.weights.nbytes + ENTRY_OVERHEAD
+
+    def values(self) -> np.ndarray:
+        return np.round(self.weights.astype(float), 2)
+
+    def unix_days(self) -> np.ndarray:
+        return self.times.astype(np.int64) / 86_400_000_000
+
+    def points(self) -> list[tuple[datetime, float]]:
+        """(created_at, weight) pairs for charts"""
+        return list(zip(self.times.tolist(), self.values().tolist()))
+
+    def with_point(self, created_at: datetime, weight: float, version: int) -> "WeightSeries":
+        at = np.datetime64(created_at, "us")
+        index = int(np.searchsorted(self.times, at))
+        return WeightSeries(np.insert(self.times, index, at), np.insert(self.weights, index, np.float32(weight)), version)
+
+_series: OrderedDict[int, WeightSeries] = OrderedDict()
+_total_bytes = 0
+
+def _put(client_id: int, series: WeightSeries):
+    global _total_bytes
+    old = _series.pop(client_id, None)
+    if old is not None:
+        _total_bytes -= old.nbytes
+    if series.nbytes > MAX_BYTES:
+        return
+    _series[client_id] = series
+    _total_bytes += series.nbytes
+    while _total_bytes > MAX_BYTES:
+        _, evicted = _series.popitem(last=False)
+        _total_bytes -= evicted.nbytes
+
+def get_series(client_id: int) -> WeightSeries | None:
+    series = _series.get(client_id)
+    if series is not None:
+        _series.move_to_end(client_id)
+    return series
+
+async def load_series(db: AsyncSession, client_id: int, version: int) -> WeightSeries:
+    """Series for a client at `version` (clients.version, read by the caller
+    before this call), cached and refilled from a two-column query when the
+    cached copy is of another version or missing.
+
+    Checking the version the caller read from the database catches writes
+    handled by other workers. The queried series is returned even when it
+    isn't cached, so callers never need the client's check-ins.
+    """
+    from models import CheckIn
+
+    series = get_series(client_id)
+    if series is not None and series.version == version:
+        return series
+
+    rows = (await db.execute(
+        select(CheckIn.created_at, CheckIn.weight)
+        .where(CheckIn.client_id == client_id, CheckIn.weight.is_not(None), CheckIn.weight != 0)
+        .order_by(CheckIn.created_at)
+    )).all()
+    series = WeightSeries(
+        np.array([created for created, _ in rows], dtype="datetime64[us]"),
+        np.array([weight for _, weight in rows], dtype=np.float32),
+        version,
+    )
+    # Rows read after the version are at least that new; a newer write just
+    # gets the series reloaded by the next caller that reads its version
+    _put(client_id, series)
+    return series
+
+def append_weight(client_id: int, version: int, created_at: datetime, weight: float | None):
+    """Add a new check-in's weigh-in to a cached series and move it to
+    `version`, the client's version after the write.
+
+    Only a series of the version before (or of this one, for later points
+    of the same batch) can be brought forward; any other is dropped, and
+    uncached clients load on next read.
+    """
+    series = _series.get(client_id)
+    if series is None:
+        return
+    if series.version not in (version - 1, version):
+        drop_series(client_id)
+        return
+    if not weight:
+        _put(client_id, WeightSeries(series.times, series.weights, version))
+        return
+    # A point at the same time is either this one, picked up by the initial
+    # query, or another weigh-in stamped alike; reloading settles which
+    at = np.datetime64(created_at, "us")
+    index = int(np.searchsorted(series.times, at))
+    if index < len(series) and series.times[index] == at:
+        drop_series(client_id)
+        return
+    _put(client_id, series.with_point(created_at, weight, version))
+
+def drop_series(client_id: int):
+    global _total_bytes
+    series = _series.pop(client_id, None)
+    if series is not None:
+        _total_bytes -= series.nbytes
@@ -0,0 +1,46 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# The app reads DATABASE_URL at import, so point it at a scratch file first
+_workdir = tempfile.mkdtemp(prefix="coachkit-test-")
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{os.path.join(_workdir, 'test.db')}"
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+# Templates and static files are found relative to the working directory
+os.chdir(ROOT)
+
+@pytest.fixture
+def app_client():
+    """A TestClient signed in as a fresh coach"""
+    from fastapi.testclient import TestClient
+    import main
+
+    with TestClient(main.app) as http:
+        email = f"coach-{os.urandom(4).hex()}@test.local"
+        response = http.post("/signup", data={"name": "Coach", "email": email, "password": "secret"}, follow_redirects=False)
+        token = response.cookies["session_token"]
+        http.cookies.clear()
+        http.cookies.set("session_token", token)
+        yield http
+
+@pytest.fixture
+def write_elsewhere(app_client):
+    """Set a client's goal or add a weigh-in as another worker would: the rows
+    and the client's version change, and this process's caches don't hear of it"""
+    from datetime import datetime
+    from sqlalchemy import update, insert
+    from database import async_session
+    from models import Client, CheckIn
+
+    async def write(client_id: int, goal_weight: float | None, weight: float | None):
+        async with async_session() as db:
+            values = {"goal_weight": goal_weight} if goal_weight is not None else {}
+            await db.execute(update(Client).where(Client.id == client_id).values(version=Client.version + 1, **values))
+            if weight is not None:
+                await db.execute(insert(CheckIn).values(client_id=client_id, weight=weight, created_at=datetime.utcnow()))
+            await db.commit()
+
+    return lambda client_id, goal_weight=None, weight=None: app_client.portal.call(write, client_id, goal_weight, weight)
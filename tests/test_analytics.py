@@ -0,0 +1,52 @@
+import pandas as pd
+
+from analytics_service import compute_cohort
+
+NOW_WEEK = 100
+
+# client_id -> [(week, check-ins, average weight or None)]
+WEEKS = {
+    1: [(week, 2, 200.0 - (week - 90)) for week in range(90, 101)],  # losing 1 lb/week
+    2: [(95, 1, 180.0), (96, 1, 182.0)],                              # gaining 2 lb/week, gone quiet
+    3: [(99, 1, None)],                                               # never weighed in
+    5: [(100, 1, 160.0)],                                             # started at the goal
+}
+GOALS = {1: 195.0, 2: 190.0, 3: 150.0, 4: 170.0, 5: 160.0}
+
+def _inputs():
+    """compute_cohort's arguments, aggregated from WEEKS as the queries would"""
+    summary, start, latest, retained = [], {}, {}, {}
+    for client_id, weeks in WEEKS.items():
+        weighed = [(week - NOW_WEEK, weight) for week, _, weight in weeks if weight is not None]
+        summary.append((
+            client_id, weeks[0][0], weeks[-1][0], sum(count for _, count, _ in weeks), len(weighed),
+            sum(x for x, _ in weighed), sum(y for _, y in weighed), sum(x * y for x, y in weighed), sum(x * x for x, _ in weighed),
+        ))
+        if weighed:
+            start[client_id], latest[client_id] = weighed[0][1], weighed[-1][1]
+        for week, _, _ in weeks:
+            retained[week - weeks[0][0]] = retained.get(week - weeks[0][0], 0) + 1
+    summary = pd.DataFrame(summary, columns=["client_id", "first_week", "last_week", "checkins", "n", "sx", "sy", "sxy", "sxx"])
+    return (summary, pd.Series(start, dtype=float), pd.Series(latest, dtype=float), pd.Series(retained, dtype=float),
+            pd.Series(GOALS, dtype=float), len(GOALS), NOW_WEEK)
+
+def test_cohort_metrics():
+    result = compute_cohort(*_inputs())
+    assert result["total_clients"] == 5
+    # Checked in this week or last
+    assert result["active_clients"] == 3
+    assert result["retention"] == [(0, 100.0), (1, 66.7)] + [(k, 50.0) for k in range(2, 6)] + \
+        [(k, 100.0) for k in range(6, 11)] + [(11, None), (12, None)]
+    assert dict(result["frequency"]) == {"< 0.5": 1, "0.5–1": 1, "1–2": 1, "2–3": 1, "3–5": 0, "5+": 0}
+    # Clients with one weighed week have no slope
+    assert result["avg_weekly_change"] == 0.5
+    assert result["median_weekly_change"] == 0.5
+    # Only clients with a goal and a weigh-in count; a goal equal to the start is reached
+    assert (result["goal_clients"], result["goal_reached"], result["goal_rate"]) == (3, 2, 66.7)
+
+def test_coach_without_check_ins():
+    empty = pd.DataFrame(columns=["client_id", "first_week", "last_week", "checkins", "n", "sx", "sy", "sxy", "sxx"])
+    series = pd.Series(dtype=float)
+    result = compute_cohort(empty, series, series, series, series, 2, NOW_WEEK)
+    assert result["total_clients"] == 2 and result["active_clients"] == 0
+    assert result["avg_weekly_change"] is None and result["goal_rate"] is None
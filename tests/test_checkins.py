@@ -0,0 +1,59 @@
+import io
+import os
+import re
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+import checkin_service
+import series_service
+from checkin_service import parse_checkins
+from deletion_service import UPLOAD_DIR
+
+def test_photo_for_a_missing_client_is_not_saved(app_client):
+    before = set(os.listdir(UPLOAD_DIR))
+    response = app_client.post("/client/999999/checkin", data={"note": "", "weight": "180"},
+                               files={"photo": ("progress.jpg", io.BytesIO(b"jpeg"), "image/jpeg")})
+    assert response.status_code == 404
+    assert set(os.listdir(UPLOAD_DIR)) == before
+
+def test_batch_rejects_non_finite_weights_and_future_times():
+    now = datetime(2026, 1, 1, 12)
+    for item in ({"client_id": 1, "weight": "nan"}, {"client_id": 1, "weight": "inf"},
+                 {"client_id": 1, "created_at": "2026-01-01T12:00:01"}):
+        with pytest.raises(ValueError, match="Check-in 1"):
+            parse_checkins([{"client_id": 1}, item], now)
+    assert parse_checkins([{"client_id": 1, "weight": "180.5", "created_at": "2026-01-01T12:00:00"}], now)[0].weight == 180.5
+
+def test_weigh_ins_with_the_same_timestamp_are_both_kept(monkeypatch):
+    at = datetime(2026, 1, 1, 12)
+    monkeypatch.setattr(series_service, "_series", series_service.OrderedDict())
+    series_service._put(1, series_service.WeightSeries(np.array([at - timedelta(days=1), at], dtype="datetime64[us]"),
+                                                       np.array([181, 180], dtype=np.float32), 3))
+    # Both the initial query's point and a second one stamped alike are possible; the cache can't tell them apart
+    series_service.append_weight(1, 4, at, 179)
+    assert series_service.get_series(1) is None
+
+def test_analytics_tray_counts_check_ins_and_lists_photos(app_client, monkeypatch, tmp_path):
+    monkeypatch.setattr(checkin_service, "UPLOAD_DIR", str(tmp_path))
+    response = app_client.post("/client", data={"name": "Sam", "email": "sam@test.local"})
+    client_id = int(re.search(r'id="client-row-(\d+)"', response.text).group(1))
+    app_client.post(f"/client/{client_id}/checkin", data={"note": "", "weight": "180"})
+    response = app_client.post(f"/client/{client_id}/checkin", data={"note": "", "weight": "179"},
+                               files={"photo": ("progress.jpg", io.BytesIO(b"jpeg"), "image/jpeg")})
+    photo = re.search(r"/static/uploads/([\w.-]+)", response.text).group(1)
+
+    response = app_client.get(f"/client/{client_id}/analytics")
+    assert response.status_code == 200
+    assert response.text.count(f"/static/uploads/{photo}") == 1
+    assert re.search(r'font-bold">2</p>\s*<p class="text-xs text-gray-500">Check-ins', response.text)
+
+def test_form_weights_must_be_finite(app_client):
+    response = app_client.post("/client", data={"name": "Sam", "email": "sam@test.local"})
+    client_id = int(re.search(r'id="client-row-(\d+)"', response.text).group(1))
+    for value in ("inf", "nan", "-inf"):
+        assert app_client.post(f"/client/{client_id}/checkin", data={"note": "", "weight": value}).status_code == 422
+        assert app_client.put(f"/client/{client_id}/goal", data={"goal_weight": value, "notes": ""}).status_code == 422
+    assert app_client.post(f"/client/{client_id}/checkin", data={"note": "", "weight": "180"}).status_code == 200
+    assert "y: 180.0" in app_client.get(f"/client/{client_id}/analytics").text
@@ -0,0 +1,13 @@
+import re
+
+from client_list_service import PAGE_SIZE
+
+def test_cursor_is_rejected_under_another_sort(app_client):
+    for n in range(PAGE_SIZE + 1):
+        app_client.post("/client", data={"name": f"Client {n:02d}", "email": f"client{n}@test.local"})
+    response = app_client.get("/clients/search", params={"sort": "name"})
+    cursor = re.search(r"cursor=([^\"&]+)", response.text).group(1)
+
+    assert app_client.get(f"/clients/search?sort=name&cursor={cursor}").status_code == 200
+    assert app_client.get(f"/clients/search?sort=recent&cursor={cursor}").status_code == 400
+    assert app_client.get("/clients/search?sort=name&cursor=garbage").status_code == 400
@@ -0,0 +1,78 @@
+import asyncio
+import re
+import zlib
+
+from jinja2 import Environment
+
+from compression_service import CompressionMiddleware, StripIndentation
+
+def _render(source: str) -> str:
+    return Environment(extensions=[StripIndentation]).from_string(source).render()
+
+def test_tag_only_lines_vanish_without_joining_their_neighbours():
+    source = "<p>\n    one\n    {% if true %}\n    two\n    {# note #}\n    {% endif %}\n    three\n</p>\n"
+    assert _render(source) == "<p>\none\ntwo\nthree\n</p>"
+
+def _run(app, accept_encoding: str = "gzip", min_bytes: int = 64) -> list[dict]:
+    """Messages the middleware sends for one GET"""
+    scope = {"type": "http", "method": "GET", "path": "/", "headers": [(b"accept-encoding", accept_encoding.encode())]}
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(CompressionMiddleware(app, min_bytes=min_bytes)(scope, receive, send))
+    return sent
+
+def _app(content_type: str, chunks: list[bytes], headers: list[tuple[bytes, bytes]] = ()):
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200,
+                    "headers": [(b"content-type", content_type.encode()), *headers]})
+        for i, chunk in enumerate(chunks):
+            await send({"type": "http.response.body", "body": chunk, "more_body": i < len(chunks) - 1})
+    return app
+
+def _headers(start: dict) -> dict:
+    return {key.decode().lower(): value.decode() for key, value in start["headers"]}
+
+def test_small_response_is_left_alone():
+    start, body = _run(_app("text/html", [b"<p>hi</p>"]))
+    assert "content-encoding" not in _headers(start)
+    assert body["body"] == b"<p>hi</p>"
+
+def test_streamed_response_is_compressed_chunk_by_chunk():
+    rows = [b"id,name\n"] + [f"{i},Client {i}\n".encode() * 20 for i in range(5)]
+    start, *bodies = _run(_app("text/csv; charset=utf-8", rows, [(b"etag", b'"abc"')]))
+    headers = _headers(start)
+    assert headers["content-encoding"] == "gzip"
+    assert headers["etag"] == 'W/"abc"'
+    assert "accept-encoding" in headers["vary"].lower()
+
+    # Each chunk is flushed: everything sent so far decompresses to everything produced so far
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    received = b""
+    for body in bodies:
+        assert body["body"]
+        received += decompressor.decompress(body["body"])
+        assert b"".join(rows).startswith(received) and received.endswith(b"\n")
+    assert received == b"".join(rows)
+    assert not bodies[-1]["more_body"]
+
+def test_event_stream_passes_through():
+    events = [b"data: " + b"x" * 100 + b"\n\n", b"data: y\n\n"]
+    start, *bodies = _run(_app("text/event-stream", events))
+    assert "content-encoding" not in _headers(start)
+    assert [body["body"] for body in bodies] == events
+
+def test_csv_export_decompresses_to_the_identity_body(app_client):
+    for n in range(30):
+        app_client.post("/client", data={"name": f"Client {n}", "email": f"client{n}@test.local"})
+    compressed = app_client.get("/export/clients.csv", headers={"Accept-Encoding": "gzip"})
+    plain = app_client.get("/export/clients.csv", headers={"Accept-Encoding": "identity"})
+    assert compressed.headers["content-encoding"] == "gzip"
+    assert "content-encoding" not in plain.headers
+    assert compressed.content == plain.content
+    assert len(re.findall(rb"client\d+@test.local", plain.content)) == 30
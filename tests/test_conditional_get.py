@@ -0,0 +1,30 @@
+import re
+
+from cache_service import client_etag
+from auth_service import decode_token
+
+def test_304_only_for_the_owning_coach(app_client):
+    response = app_client.post("/client", data={"name": "Sam", "email": "sam@test.local"})
+    client_id = int(re.search(r'id="client-row-(\d+)"', response.text).group(1))
+    etag = app_client.get(f"/client/{client_id}/goal").headers["etag"]
+    assert app_client.get(f"/client/{client_id}/goal", headers={"If-None-Match": etag}).status_code == 304
+
+    response = app_client.post("/signup", data={"name": "Other", "email": f"other-{client_id}@test.local", "password": "secret"},
+                               follow_redirects=False)
+    token = response.cookies["session_token"]
+    app_client.cookies.set("session_token", token)
+    other_coach = decode_token(token)["coach_id"]
+    crafted = client_etag(other_coach, client_id, 0)
+    for if_none_match in ("*", crafted):
+        response = app_client.get(f"/client/{client_id}/goal", headers={"If-None-Match": if_none_match})
+        assert response.status_code == 404
+
+def test_write_on_another_worker_changes_the_etag(app_client, write_elsewhere):
+    response = app_client.post("/client", data={"name": "Sam", "email": "sam@test.local"})
+    client_id = int(re.search(r'id="client-row-(\d+)"', response.text).group(1))
+    etag = app_client.get(f"/client/{client_id}/goal").headers["etag"]
+
+    write_elsewhere(client_id, 170)
+    response = app_client.get(f"/client/{client_id}/goal", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
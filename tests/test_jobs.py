@@ -0,0 +1,27 @@
+import time
+
+import job_service
+from auth_service import decode_token
+
+def test_finished_job_is_polled_from_the_table(app_client):
+    async def run():
+        return "<p>Done</p>", {"HX-Trigger": "jobDone"}
+
+    coach_id = decode_token(app_client.cookies["session_token"])["coach_id"]
+    job = app_client.portal.call(job_service.submit, "cleanup", coach_id, run, "Testing")
+    for _ in range(50):
+        response = app_client.get(f"/jobs/{job.id}")
+        if response.text == "<p>Done</p>":
+            break
+        time.sleep(0.05)
+    assert response.text == "<p>Done</p>"
+    assert response.headers["hx-trigger"] == "jobDone"
+    # Answered by the table, as it would be on a worker that didn't run the job
+    assert job.id not in job_service._running
+
+    response = app_client.post("/signup", data={"name": "Other", "email": f"other-{job.id}@test.local", "password": "secret"},
+                               follow_redirects=False)
+    token = response.cookies["session_token"]
+    app_client.cookies.clear()
+    app_client.cookies.set("session_token", token)
+    assert app_client.get(f"/jobs/{job.id}").status_code == 404
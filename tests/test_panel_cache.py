@@ -0,0 +1,13 @@
+import re
+
+def _new_client(http) -> int:
+    response = http.post("/client", data={"name": "Sam", "email": "sam@test.local"})
+    return int(re.search(r'id="client-row-(\d+)"', response.text).group(1))
+
+def test_panels_follow_writes_from_other_workers(app_client, write_elsewhere):
+    client_id = _new_client(app_client)
+    app_client.put(f"/client/{client_id}/goal", data={"goal_weight": "180", "notes": ""})
+    assert "180.0 lbs" in app_client.get(f"/client/{client_id}/goal").text
+
+    write_elsewhere(client_id, 170)
+    assert "170.0 lbs" in app_client.get(f"/client/{client_id}/goal").text
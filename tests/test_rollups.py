@@ -0,0 +1,69 @@
+import asyncio
+import random
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from models import Base, Coach, Client, CheckIn, CheckInWeekly
+from rollup_service import record_checkin, record_checkins, rebuild_weekly_rollups
+
+def _columns(row):
+    return (row.client_id, row.week, row.checkin_count, row.weight_count, row.weight_sum,
+            row.weight_min, row.weight_max, row.photo_count)
+
+def _upserted_and_rebuilt(path, single: list[dict], batch: list[dict]):
+    """Rollup rows from the insert-time upserts, then from a full rebuild"""
+    async def run():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with AsyncSession(engine) as db:
+            db.add(Coach(id=1, name="Coach", email="coach@test.local", password_hash="x"))
+            db.add_all([Client(id=client_id, coach_id=1, name=f"Client {client_id}") for client_id in (1, 2)])
+            await db.flush()
+            for row in single:
+                checkin = CheckIn(**row)
+                db.add(checkin)
+                await record_checkin(db, checkin)
+            await db.execute(insert(CheckIn), batch)
+            await record_checkins(db, batch)
+            await db.commit()
+            upserted = [_columns(row) for row in (await db.execute(select(CheckInWeekly))).scalars()]
+        async with engine.begin() as conn:
+            await conn.run_sync(rebuild_weekly_rollups)
+        async with AsyncSession(engine) as db:
+            rebuilt = [_columns(row) for row in (await db.execute(select(CheckInWeekly))).scalars()]
+        await engine.dispose()
+        return sorted(upserted), sorted(rebuilt)
+    return asyncio.run(run())
+
+def test_zero_weight_is_not_a_weigh_in(tmp_path):
+    at = datetime(2026, 3, 2, 9)
+    upserted, rebuilt = _upserted_and_rebuilt(tmp_path / "rollups.db", [
+        {"client_id": 1, "weight": 180.0, "created_at": at},
+        {"client_id": 1, "weight": 0.0, "created_at": at + timedelta(days=1)},
+    ], [{"client_id": 1, "weight": 0.0, "photo": None, "created_at": at + timedelta(days=2)}])
+    assert upserted == rebuilt
+    (row,) = upserted
+    assert row[2:] == (3, 1, 180.0, 180.0, 180.0, 0)
+
+def test_upserts_match_a_rebuild(tmp_path):
+    rng = random.Random(3)
+    # Sunday night and Monday morning straddle a week boundary
+    edges = [datetime(2026, 3, 1, 23, 59, 59), datetime(2026, 3, 2, 0, 0, 0)]
+    times = edges + [datetime(2026, 1, 5) + timedelta(minutes=rng.randint(0, 60 * 24 * 90)) for _ in range(300)]
+    rows = [{
+        "client_id": rng.choice([1, 2]),
+        "weight": rng.choice([None, 0.0, round(rng.uniform(150, 220), 1)]),
+        "photo": rng.choice([None, None, "progress.jpg"]),
+        "created_at": created_at,
+    } for created_at in times]
+    upserted, rebuilt = _upserted_and_rebuilt(tmp_path / "rollups.db", rows[:100], rows[100:])
+
+    assert len(upserted) > 20
+    for mine, theirs in zip(upserted, rebuilt, strict=True):
+        # Counts and extremes match exactly; sums only up to the order of addition
+        assert mine[:4] == theirs[:4] and mine[5:] == theirs[5:]
+        assert mine[4] == pytest.approx(theirs[4])
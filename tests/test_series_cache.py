@@ -0,0 +1,33 @@
+import re
+
+import series_service
+
+def _new_client(http) -> int:
+    response = http.post("/client", data={"name": "Sam", "email": "sam@test.local"})
+    assert response.status_code == 200
+    return int(re.search(r'id="client-row-(\d+)"', response.text).group(1))
+
+def test_goal_panels_render_with_the_series_cache_off(app_client, monkeypatch):
+    monkeypatch.setattr(series_service, "MAX_BYTES", 0)
+    client_id = _new_client(app_client)
+    for weight in ("200", "198", "196.5"):
+        assert app_client.post(f"/client/{client_id}/checkin", data={"note": "", "weight": weight}).status_code == 200
+    assert series_service.get_series(client_id) is None
+
+    response = app_client.put(f"/client/{client_id}/goal", data={"goal_weight": "180", "notes": ""})
+    assert response.status_code == 200
+    assert "196.5 lbs" in response.text
+
+    response = app_client.get(f"/client/{client_id}/goal")
+    assert response.status_code == 200
+    assert "196.5 lbs" in response.text
+
+def test_series_follows_check_ins_from_other_workers(app_client, write_elsewhere):
+    client_id = _new_client(app_client)
+    for weight in ("200", "198"):
+        app_client.post(f"/client/{client_id}/checkin", data={"note": "", "weight": weight})
+    app_client.put(f"/client/{client_id}/goal", data={"goal_weight": "180", "notes": ""})
+    assert "198.0 lbs" in app_client.get(f"/client/{client_id}/goal").text
+
+    write_elsewhere(client_id, weight=195)
+    assert "195.0 lbs" in app_client.get(f"/client/{client_id}/goal").text
@@ -0,0 +1,94 @@
+import math
+import random
+
+import numpy as np
+
+from trend_service import (WeightTrend, compute_trend, compute_trends, from_julian, WINDOW_DAYS, REGRESSION_DAYS,
+                           HALFLIFE_DAYS, MIN_POINTS, PLATEAU_RATE, MAX_PROJECTION_DAYS)
+
+TODAY = 2461000.5
+
+def _reference(days, weights, start, latest, goal, today) -> WeightTrend:
+    """compute_trends' rules for one client, written as a plain loop"""
+    start = None if math.isnan(start) else start
+    latest = None if math.isnan(latest) else latest
+    points = [(d, w) for d, w in zip(days, weights) if d >= today - WINDOW_DAYS]
+    if not points:
+        return WeightTrend(start=start, latest=latest)
+    last = points[-1][0]
+    decay = [2 ** ((d - last) / HALFLIFE_DAYS) for d, _ in points]
+    smoothed = sum(f * w for f, (_, w) in zip(decay, points)) / sum(decay)
+
+    window = [(d - last, w) for d, w in points if d - last >= -REGRESSION_DAYS]
+    if len(window) < MIN_POINTS or -min(x for x, _ in window) < 7:
+        return WeightTrend(start=start, latest=latest, smoothed=round(smoothed, 1))
+    x, y = np.array(window).T
+    slope, intercept = np.polyfit(x, y, 1)
+    residuals = y - (slope * x + intercept)
+    mad = np.median(np.abs(residuals - np.median(residuals)))
+    keep = np.abs(residuals) <= 3 * 1.4826 * mad if mad else np.ones(len(x), dtype=bool)
+    if keep.sum() >= MIN_POINTS:
+        slope = np.polyfit(x[keep], y[keep], 1)[0]
+
+    has_goal = not math.isnan(goal) and start is not None
+    reached = has_goal and (smoothed <= goal if goal < start else smoothed >= goal)
+    open_goal = has_goal and not reached
+    plateau = abs(slope * 7) < PLATEAU_RATE and not reached
+    moving_toward = (goal - smoothed) * slope if has_goal else math.nan
+    on_pace = open_goal and moving_toward > 0 and (goal - smoothed) / slope <= MAX_PROJECTION_DAYS
+    return WeightTrend(
+        start=start, latest=latest, smoothed=round(smoothed, 1), weekly_rate=round(slope * 7, 2), plateau=plateau,
+        away_from_goal=open_goal and not plateau and moving_toward < 0,
+        goal_date=from_julian(last + (goal - smoothed) / slope) if on_pace else None,
+    )
+
+def _client(rng: random.Random):
+    """Check-in days and weights in one of several shapes, oldest first"""
+    shape = rng.choice(["losing", "gaining", "flat", "sparse", "stale", "outlier"])
+    first = TODAY - rng.uniform(10, 120)
+    days = sorted(rng.uniform(first, TODAY) for _ in range(rng.randint(1, 40) if shape != "sparse" else 3))
+    if shape == "stale":
+        days = [d - WINDOW_DAYS - 30 for d in days]
+    rate = {"losing": -0.2, "gaining": 0.15}.get(shape, 0.0)
+    weights = [round(190 + rate * (d - first) + rng.gauss(0, 0.6), 1) for d in days]
+    if shape == "outlier" and len(weights) > 5:
+        weights[-3] += 25
+    return days, weights
+
+def test_grouped_trends_match_a_per_client_reference():
+    rng = random.Random(7)
+    clients = [_client(rng) for _ in range(200)]
+    goal = np.array([rng.choice([np.nan, 170.0, 185.0, 200.0]) for _ in clients])
+    start = np.array([w[0] for _, w in clients])
+    latest = np.array([w[-1] for _, w in clients])
+    group = np.concatenate([np.full(len(d), i) for i, (d, _) in enumerate(clients)])
+    days = np.concatenate([d for d, _ in clients])
+    weights = np.concatenate([w for _, w in clients])
+
+    trends = compute_trends(group, days, weights, start, latest, goal, TODAY)
+    for i, (d, w) in enumerate(clients):
+        expected = _reference(d, w, start[i], latest[i], goal[i], TODAY)
+        assert trends[i] == expected, i
+        # A group on its own gives the same answer as in the batch
+        assert compute_trend(np.array(d), np.array(w), start[i], None if np.isnan(goal[i]) else goal[i], TODAY) == expected
+
+    flags = [(t.plateau, t.away_from_goal, t.goal_date is not None) for t in trends]
+    assert any(f[0] for f in flags) and any(f[1] for f in flags) and any(f[2] for f in flags)
+
+def test_outlier_is_dropped_from_the_rate():
+    days = TODAY - np.arange(27, -1, -1, dtype=float)
+    weights = 200 - (days - days[0]) / 7  # 1 lb/week down
+    spiked = weights.copy()
+    spiked[20] += 30
+    clean = compute_trend(days, weights, 200.0, 180.0, TODAY)
+    trend = compute_trend(days, spiked, 200.0, 180.0, TODAY)
+    assert clean.weekly_rate == -1.0
+    assert trend.weekly_rate == clean.weekly_rate
+    assert trend.goal_date is not None and not trend.plateau and not trend.away_from_goal
+
+def test_plateau_and_away_from_goal():
+    days = TODAY - np.arange(27, -1, -1, dtype=float)
+    flat = compute_trend(days, np.full(days.size, 190.0), 200.0, 180.0, TODAY)
+    assert flat.plateau and not flat.away_from_goal and flat.goal_date is None
+    gaining = compute_trend(days, 190 + (days - days[0]) / 7, 200.0, 180.0, TODAY)
+    assert gaining.away_from_goal and not gaining.plateau and gaining.goal_date is None
@@ -0,0 +1,223 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+import numpy as np
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from series_service import WeightSeries
+
+# Trends describe the recent past: only weigh-ins inside the window count
+WINDOW_DAYS = 60  # about 8.5 EWMA half-lives
+REGRESSION_DAYS = 28
+HALFLIFE_DAYS = 7.0
+MIN_POINTS = 4
+PLATEAU_RATE = 0.25  # lbs/week
+MAX_PROJECTION_DAYS = 730
+MAX_CACHED = 10_000
+
+UNIX_EPOCH = datetime(1970, 1, 1)
+UNIX_EPOCH_JULIAN = 2440587.5
+
+@dataclass(frozen=True)
+class WeightTrend:
+    start: float | None = None          # first weigh-in ever
+    latest: float | None = None         # most recent weigh-in
+    smoothed: float | None = None       # EWMA of recent weigh-ins
+    weekly_rate: float | None = None    # lbs/week over the last REGRESSION_DAYS
+    plateau: bool = False
+    away_from_goal: bool = False
+    goal_date: date | None = None       # projected date of reaching the goal at the current rate
+
+def to_julian(moment: datetime) -> float:
+    return (moment - UNIX_EPOCH).total_seconds() / 86400 + UNIX_EPOCH_JULIAN
+
+def from_julian(day: float) -> date:
+    return (UNIX_EPOCH + timedelta(days=day - UNIX_EPOCH_JULIAN)).date()
+
+def _group_median(values: np.ndarray, group: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    """Median of `values` within each group; groups are 0..len(counts)-1 and none are empty"""
+    ordered = values[np.lexsort((values, group))]
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    return (ordered[starts + (counts - 1) // 2] + ordered[starts + counts // 2]) / 2
+
+def _fit(x: np.ndarray, y: np.ndarray, group: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Per-group least squares of y on x from bincount sums: (n, slope, intercept)"""
+    n = np.bincount(group, minlength=k).astype(float)
+    sx, sy = np.bincount(group, x, k), np.bincount(group, y, k)
+    sxx, sxy = np.bincount(group, x * x, k), np.bincount(group, x * y, k)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        slope = (n * sxy - sx * sy) / (n * sxx - sx ** 2)
+        intercept = (sy - slope * sx) / n
+    return n, slope, intercept
+
+def compute_trends(group: np.ndarray, days: np.ndarray, weights: np.ndarray, start: np.ndarray,
+                   latest: np.ndarray, goal: np.ndarray, today: float) -> list[WeightTrend]:
+    """Trends for k clients at once.
+
+    Rows are weigh-ins sorted by (group, day), where group is the client's
+    position 0..k-1 and days are julian. start, latest and goal have one
+    entry per client, NaN when missing. Every step is a grouped array
+    operation rather than a Python loop over clients.
+
+    The EWMA uses time-aware decay, so uneven check-in gaps are weighted by
+    how long ago they were rather than by position. The weekly rate is a
+    least-squares fit over the last REGRESSION_DAYS, refit once without
+    points more than 3 MADs from the line.
+    """
+    k = len(start)
+    recent = days >= today - WINDOW_DAYS
+    group, days, weights = group[recent], days[recent], weights[recent]
+    counts = np.bincount(group, minlength=k)
+    has_recent = counts > 0
+
+    # Rows are sorted by (group, day), so each non-empty group ends at its last weigh-in
+    last_day = np.full(k, np.nan)
+    last_day[has_recent] = days[(np.cumsum(counts) - 1)[has_recent]]
+    x = days - last_day[group]
+    decay = np.exp2(x / HALFLIFE_DAYS)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        smoothed = np.bincount(group, decay * weights, k) / np.bincount(group, decay, k)
+
+    window = x >= -REGRESSION_DAYS
+    wg, wx, wy = group[window], x[window], weights[window]
+    span = np.zeros(k)
+    np.minimum.at(span, wg, wx)
+    n, slope, intercept = _fit(wx, wy, wg, k)
+    fitted = (n >= MIN_POINTS) & (-span >= 7)
+
+    # Robust refit for groups with enough points; other groups are discarded below
+    if fitted.any():
+        rows = fitted[wg]
+        rg, rx, ry = wg[rows], wx[rows], wy[rows]
+        residuals = ry - (slope[rg] * rx + intercept[rg])
+        fitted_counts = np.bincount(rg, minlength=k)[fitted]
+        index = np.cumsum(fitted) - 1
+        med = _group_median(residuals, index[rg], fitted_counts)
+        mad = np.zeros(k)
+        mad[fitted] = _group_median(np.abs(residuals - med[index[rg]]), index[rg], fitted_counts)
+        keep = (mad[rg] == 0) | (np.abs(residuals) <= 3 * 1.4826 * mad[rg])
+        n2, slope2, _ = _fit(rx[keep], ry[keep], rg[keep], k)
+        refit = fitted & (n2 >= MIN_POINTS)
+        slope = np.where(refit, slope2, slope)
+
+    weekly_rate = slope * 7
+    with np.errstate(divide="ignore", invalid="ignore"):
+        reached = np.where(goal < start, smoothed <= goal, smoothed >= goal)
+        moving_toward = (goal - smoothed) * slope
+        days_needed = (goal - smoothed) / slope
+    has_goal = ~np.isnan(goal) & ~np.isnan(start)
+    open_goal = has_goal & ~reached
+    plateau = fitted & (np.abs(weekly_rate) < PLATEAU_RATE) & ~(has_goal & reached)
+    away = fitted & open_goal & ~plateau & (moving_toward < 0)
+    on_pace = fitted & open_goal & (moving_toward > 0) & (days_needed <= MAX_PROJECTION_DAYS)
+
+    def value(array, i):
+        return None if np.isnan(array[i]) else float(array[i])
+
+    trends = []
+    for i in range(k):
+        if not has_recent[i]:
+            trends.append(WeightTrend(start=value(start, i), latest=value(latest, i)))
+        elif not fitted[i]:
+            trends.append(WeightTrend(start=value(start, i), latest=value(latest, i), smoothed=round(float(smoothed[i]), 1)))
+        else:
+            trends.append(WeightTrend(
+                start=value(start, i),
+                latest=value(latest, i),
+                smoothed=round(float(smoothed[i]), 1),
+                weekly_rate=round(float(weekly_rate[i]), 2),
+                plateau=bool(plateau[i]),
+                away_from_goal=bool(away[i]),
+                goal_date=from_julian(last_day[i] + days_needed[i]) if on_pace[i] else None,
+            ))
+    return trends
+
+def compute_trend(days: np.ndarray, weights: np.ndarray, start: float | None, goal: float | None, today: float) -> WeightTrend:
+    """Trend for one client's ascending julian `days` and matching `weights`"""
+    def array(value):
+        return np.array([np.nan if value is None else value], dtype=float)
+    latest = float(weights[-1]) if len(weights) else None
+    group = np.zeros(len(days), dtype=np.int64)
+    return compute_trends(group, days, weights, array(start), array(latest), array(goal), today)[0]
+
+# client_id -> (version, day, trend); versions are clients.version, which every write bumps
+_trends: OrderedDict[int, tuple] = OrderedDict()
+
+def _cache(client_id: int, trend: WeightTrend, version: int, day: date):
+    _trends[client_id] = (version, day, trend)
+    _trends.move_to_end(client_id)
+    while len(_trends) > MAX_CACHED:
+        _trends.popitem(last=False)
+
+def client_trend(client, series: WeightSeries) -> WeightTrend:
+    """Trend for a Client from its weight series, cached per series version and day"""
+    version = series.version
+    day = datetime.utcnow().date()
+    cached = _trends.get(client.id)
+    if cached and cached[0] == version and cached[1] == day:
+        return cached[2]
+
+    days, weights = series.unix_days() + UNIX_EPOCH_JULIAN, series.values()
+    start = float(weights[0]) if len(weights) else None
+    trend = compute_trend(days, weights, start, client.goal_weight, to_julian(datetime.utcnow()))
+    _cache(client.id, trend, version, day)
+    return trend
+
+async def coach_trends(db: AsyncSession, coach_id: int) -> dict[int, WeightTrend]:
+    """Trends for every client of a coach in one pass.
+
+    Recent weigh-ins come back sorted by client as plain columns and go
+    through compute_trends together. Results also fill the per-client cache.
+    """
+    from models import Client, CheckIn
+
+    now = datetime.utcnow()
+    weighed = (CheckIn.weight.is_not(None), CheckIn.weight != 0)
+
+    def edge_weight(order):
+        # One index seek per client on (client_id, created_at)
+        return select(CheckIn.weight).where(CheckIn.client_id == Client.id, *weighed).order_by(order).limit(1).scalar_subquery()
+
+    clients = (await db.execute(
+        select(Client.id, Client.goal_weight, edge_weight(CheckIn.created_at), edge_weight(CheckIn.created_at.desc()),
+               Client.version)
+        .where(Client.coach_id == coach_id)
+        .order_by(Client.id)
+    )).all()
+    client_ids = np.array([row[0] for row in clients], dtype=np.int64)
+    # NULLs become NaN
+    goal, start, latest = (np.array([row[i] for row in clients], dtype=float) for i in (1, 2, 3))
+
+    # Core execution: skips ORM row processing, which dominates at this row count
+    connection = await db.connection()
+    rows = (await connection.execute(
+        select(CheckIn.client_id, func.julianday(CheckIn.created_at), CheckIn.weight)
+        .where(
+            CheckIn.client_id.in_(select(Client.id).where(Client.coach_id == coach_id)),
+            *weighed,
+            CheckIn.created_at >= now - timedelta(days=WINDOW_DAYS),
+        )
+        .order_by(CheckIn.client_id, CheckIn.created_at)
+    )).all()
+    # Rows are tuples underneath; flattening them is far cheaper than np.array(rows)
+    data = np.fromiter((value for row in rows for value in row), dtype=float, count=3 * len(rows)).reshape(-1, 3)
+    group = np.searchsorted(client_ids, data[:, 0].astype(np.int64))
+
+    computed = compute_trends(group, data[:, 1], data[:, 2], start, latest, goal, to_julian(now))
+    trends = dict(zip(client_ids.tolist(), computed))
+
+    day = now.date()
+    for (client_id, *_, version), trend in zip(clients, computed):
+        _cache(client_id, trend, version, day)
+    return trends
+
+def summarize_trends(trends: dict[int, WeightTrend]) -> dict:
+    """Counts for the cohort view"""
+    with_trend = [t for t in trends.values() if t.weekly_rate is not None]
+    return {
+        "regression_days": REGRESSION_DAYS,
+        "with_trend": len(with_trend),
+        "on_pace": sum(1 for t in with_trend if t.goal_date),
+        "plateau": sum(1 for t in with_trend if t.plateau),
+        "away": sum(1 for t in with_trend if t.away_from_goal),
+    }